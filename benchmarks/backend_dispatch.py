@@ -0,0 +1,35 @@
+"""
+Per-row cost of reading and writing a FallbackJSONField value. Reading applies
+the field's ``get_db_converters()`` like the SQL compiler does for every row of
+a query result, and then builds the model instance of the row like querysets
+do. Only the field API is used, so the script also runs against older checkouts
+of the package to compare, e.g. by copying this directory into a worktree of
+the baseline commit.
+"""
+import json
+
+from common import bench
+from django.db import DEFAULT_DB_ALIAS, connections
+from tests.testapp.models import Book
+
+connection = connections[DEFAULT_DB_ALIAS]
+field = Book._meta.get_field('data')
+field_names = [f.attname for f in Book._meta.concrete_fields]
+raw = json.dumps({'title': 'The Lord of the Rings', 'author': 'Tolkien', 'publication': {'year': 1954}})
+value = json.loads(raw)
+converters = field.get_db_converters(connection)
+
+
+def convert(value):
+    for converter in converters:
+        value = converter(value, None, connection)
+    return value
+
+
+if __name__ == '__main__':
+    bench('json.loads (lower bound)', lambda: json.loads(raw))
+    bench('row conversion', lambda: convert(raw))
+    bench('row conversion: NULL', lambda: convert(None), number=1000000)
+    bench('model instance', lambda: Book.from_db(DEFAULT_DB_ALIAS, field_names, [1, convert(raw)]))
+    bench('from_db_value', lambda: field.from_db_value(raw, None, connection))
+    bench('get_db_prep_value', lambda: field.get_db_prep_value(value, connection))
@@ -0,0 +1,35 @@
+"""
+Throughput of decoding query results row by row and in batches, for small,
+medium and large documents.
+"""
+import json
+
+from common import bench
+from django.db import DEFAULT_DB_ALIAS, connections
+from jsonfallback.batch import end_batch
+from jsonfallback.fields import FallbackJSONField
+
+connection = connections[DEFAULT_DB_ALIAS]
+
+
+def document(size):
+    doc = {'id': 0, 'items': []}
+    while len(json.dumps(doc)) < size:
+        doc['items'].append({'name': 'item', 'price': 9.99})
+    return doc
+
+
+def load(field, rows):
+    end_batch()
+    values = [field.from_db_value(raw, None, connection) for raw in rows]
+    for value in values:
+        value['id']
+    return values
+
+
+if __name__ == '__main__':
+    for size, count in ((100, 20000), (1024, 5000), (50 * 1024, 100)):
+        rows = [json.dumps(dict(document(size), id=i), sort_keys=True) for i in range(count)]
+        for label, field in (('per row', FallbackJSONField()), ('batched', FallbackJSONField(batch_decode=True))):
+            per_call = bench('{} bytes, {}: {} rows'.format(size, label, count), lambda: load(field, rows), number=5)
+            print('{:<50} {:>10.1f} MiB/s'.format('', sum(map(len, rows)) / (per_call / 1e9) / 2 ** 20))
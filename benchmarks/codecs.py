@@ -0,0 +1,29 @@
+"""
+Encoding and decoding cost of a typical document through FallbackJSONField
+with each available codec.
+"""
+from common import bench
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections
+from jsonfallback.fields import FallbackJSONField
+
+connection = connections[DEFAULT_DB_ALIAS]
+value = {
+    'title': 'The Lord of the Rings',
+    'author': 'Tolkien',
+    'publication': {'year': 1954, 'publisher': 'Allen & Unwin'},
+    'tags': ['fantasy', 'classic', 'adventure'],
+    'chapters': [{'number': i, 'title': 'Chapter {}'.format(i), 'pages': 20 + i} for i in range(40)],
+}
+
+if __name__ == '__main__':
+    for name in ('json', 'orjson', 'ujson'):
+        field = FallbackJSONField(codec=name, encoder=DjangoJSONEncoder)
+        try:
+            raw = field.get_db_prep_value(value, connection)
+        except ImproperlyConfigured:
+            print('{}: not installed'.format(name))
+            continue
+        bench('{}: get_db_prep_value'.format(name), lambda: field.get_db_prep_value(value, connection), number=10000)
+        bench('{}: from_db_value'.format(name), lambda: field.from_db_value(raw, None, connection), number=10000)
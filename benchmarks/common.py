@@ -0,0 +1,27 @@
+"""
+Shared setup for the benchmark scripts in this directory. Run them from the
+repository root, e.g. ``python benchmarks/backend_dispatch.py``. They use the
+test settings, so ``TOXDB`` selects the database just like for the test suite.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('TOXDB', 'sqlite')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # NOQA isort:skip
+
+django.setup()
+
+
+def bench(label, func, number=100000, repeat=5):
+    """
+    Runs ``func`` ``number`` times, keeps the best of ``repeat`` runs and
+    prints the cost of a single call.
+    """
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    per_call = best / number * 1e9
+    print('{:<50} {:>10.1f} ns/call'.format(label, per_call))
+    return per_call
@@ -0,0 +1,53 @@
+"""
+Stored size and write and read cost of documents with and without
+compression on text-fallback backends.
+"""
+import json
+import os
+import tempfile
+
+from common import bench
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from jsonfallback.compression import train_dictionary
+from jsonfallback.fields import FallbackJSONField
+
+connection = connections[DEFAULT_DB_ALIAS]
+documents = [
+    {
+        'id': i,
+        'title': 'Book {}'.format(i),
+        'author': ['Tolkien', 'Rowling', 'Pratchett'][i % 3],
+        'chapters': [{'number': n, 'title': 'Chapter {}'.format(n), 'pages': 20 + (i + n) % 13} for n in range(i % 40)],
+    }
+    for i in range(1000)
+]
+
+
+def fields():
+    yield 'uncompressed', FallbackJSONField()
+    yield 'zlib', FallbackJSONField(compression='zlib')
+    yield 'zstd', FallbackJSONField(compression='zstd')
+    try:
+        dictionary = train_dictionary([json.dumps(doc, sort_keys=True) for doc in documents[::10]])
+    except ImproperlyConfigured:
+        return
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(dictionary)
+    yield 'zlib with dictionary', FallbackJSONField(compression='zlib', compression_dictionary=f.name)
+    yield 'zstd with dictionary', FallbackJSONField(compression='zstd', compression_dictionary=f.name)
+    os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    for label, field in fields():
+        try:
+            stored = [field.get_db_prep_value(doc, connection) for doc in documents]
+        except ImproperlyConfigured:
+            print('{}: not installed'.format(label))
+            continue
+        print('{:<50} {:>10} bytes'.format('{}: stored size of 1000 documents'.format(label), sum(map(len, stored))))
+        bench('{}: write 1000 documents'.format(label),
+              lambda: [field.get_db_prep_value(doc, connection) for doc in documents], number=10)
+        bench('{}: read 1000 documents'.format(label),
+              lambda: [field.from_db_value(raw, None, connection) for raw in stored], number=10)
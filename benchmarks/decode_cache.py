@@ -0,0 +1,38 @@
+"""
+Decoding cost and resident memory of many rows sharing a small set of
+payloads, with and without the decode cache.
+"""
+import json
+import tracemalloc
+
+from common import bench
+from django.db import DEFAULT_DB_ALIAS, connections
+from jsonfallback.cache import get_decode_cache
+from jsonfallback.fields import FallbackJSONField
+
+connection = connections[DEFAULT_DB_ALIAS]
+payloads = [
+    json.dumps({'status': 'ok', 'config': {'retries': i, 'targets': ['a', 'b', 'c'] * 10}}, sort_keys=True)
+    for i in range(10)
+]
+rows = [payloads[i % len(payloads)] for i in range(10000)]
+
+
+def load(field):
+    values = [field.from_db_value(raw, None, connection) for raw in rows]
+    for value in values:
+        value['status']
+    return values
+
+
+if __name__ == '__main__':
+    for label, field in (('plain', FallbackJSONField()), ('decode_cache', FallbackJSONField(decode_cache=True))):
+        get_decode_cache().clear()
+        tracemalloc.start()
+        values = load(field)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del values
+        bench('{}: load and read 10000 rows'.format(label), lambda: load(field), number=5)
+        print('{:<50} {:>10.1f} KiB'.format('{}: memory held by 10000 rows'.format(label), memory / 1024))
+    print(get_decode_cache().stats())
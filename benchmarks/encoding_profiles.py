@@ -0,0 +1,32 @@
+"""
+Stored size and encoding cost of Latin and non-Latin documents with each
+encoding profile and codec.
+"""
+from common import bench
+from django.core.exceptions import ImproperlyConfigured
+from jsonfallback.codecs import PROFILES, get_codec
+
+documents = {
+    'latin': {
+        'title': 'The Lord of the Rings',
+        'chapters': [{'number': i, 'title': 'Chapter {}'.format(i), 'pages': 20 + i} for i in range(40)],
+    },
+    'cyrillic': {
+        'title': 'Властелин колец',
+        'chapters': [{'number': i, 'title': 'Глава {}'.format(i), 'pages': 20 + i} for i in range(40)],
+    },
+}
+
+if __name__ == '__main__':
+    for name in ('json', 'orjson', 'ujson'):
+        try:
+            codec = get_codec(name)
+        except ImproperlyConfigured:
+            print('{}: not installed'.format(name))
+            continue
+        for doc_name, value in documents.items():
+            for profile_name, profile in PROFILES.items():
+                label = '{}, {}, {}'.format(name, doc_name, profile_name)
+                size = len(codec.dumps(value, profile=profile).encode())
+                bench('{}: dumps'.format(label), lambda: codec.dumps(value, profile=profile), number=10000)
+                print('{:<50} {:>10} bytes'.format('', size))
@@ -0,0 +1,24 @@
+"""
+Query compilation time for deep key paths and for many JSONExtract annotations.
+The queries are only compiled, not executed, so this also works with
+TOXDB=postgres without a running server.
+"""
+from common import bench
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from jsonfallback.functions import JSONExtract
+from tests.testapp.models import Book
+
+connection = connections[DEFAULT_DB_ALIAS]
+
+deep = Book.objects.filter(**{'data__' + '__'.join('k{}'.format(i) for i in range(20)): 1})
+wide = Book.objects.annotate(**{
+    'a{}'.format(i): JSONExtract('data', 'section{}'.format(i % 5), 'field{}'.format(i), 'value')
+    for i in range(50)
+}).filter(Q(**{'data__section{}__field{}__gt'.format(i % 5, i): i for i in range(50)}))
+
+if __name__ == '__main__':
+    bench('{}: 20 levels deep filter'.format(connection.vendor),
+          lambda: deep.query.get_compiler(connection=connection).as_sql(), number=2000)
+    bench('{}: 50 annotations, 50 filters'.format(connection.vendor),
+          lambda: wide.query.get_compiler(connection=connection).as_sql(), number=200)
@@ -0,0 +1,42 @@
+"""
+Cost of filtering on a key and extracting a key in SQLite, with documents
+stored as text and as JSONB (SQLite 3.45+).
+"""
+import json
+import sqlite3
+
+from common import bench
+from jsonfallback.backends import sqlite_compile_json_path
+
+documents = [
+    json.dumps({
+        'id': i,
+        'author': ['Tolkien', 'Rowling', 'Pratchett'][i % 3],
+        'chapters': [{'number': n, 'title': 'Chapter {}'.format(n)} for n in range(20)],
+    }, sort_keys=True)
+    for i in range(10000)
+]
+
+
+def table(db, name, placeholder):
+    db.execute('CREATE TABLE {} (data BLOB)'.format(name))
+    db.executemany('INSERT INTO {} VALUES ({})'.format(name, placeholder), [(doc,) for doc in documents])
+
+
+if __name__ == '__main__':
+    if sqlite3.sqlite_version_info < (3, 45):
+        print('SQLite {} does not support JSONB'.format(sqlite3.sqlite_version))
+    else:
+        db = sqlite3.connect(':memory:')
+        table(db, 'text_docs', '?')
+        table(db, 'jsonb_docs', 'jsonb(?)')
+        path = sqlite_compile_json_path(('author',))
+        for name in ('text_docs', 'jsonb_docs'):
+            size = db.execute('SELECT SUM(length(data)) FROM {}'.format(name)).fetchone()[0]
+            print('{:<50} {:>10} bytes'.format('{}: stored size'.format(name), size))
+            bench('{}: filter on a key'.format(name), lambda: db.execute(
+                'SELECT COUNT(*) FROM {} WHERE (data ->> ?) = ?'.format(name), [path, 'Tolkien']
+            ).fetchone(), number=20)
+            bench('{}: extract a key'.format(name), lambda: db.execute(
+                'SELECT data -> ? FROM {}'.format(name), [path]
+            ).fetchall(), number=20)
@@ -0,0 +1,1189 @@
+import json
+from functools import lru_cache
+
+from django.db import NotSupportedError
+from django.db.backends.ddl_references import Statement, Table
+from django.db.models import Func, Value
+from django_mysql.utils import connection_is_mariadb
+
+from .codecs import EncodingProfile
+from .tracking import fingerprint, loaded_documents
+
+
+class JSONValue(Func):
+    function = 'CAST'
+    template = '%(function)s(%(expressions)s AS JSON)'
+
+    def __init__(self, expression):
+        super(JSONValue, self).__init__(Value(expression))
+
+
+def postgres_compile_json_path(key_transforms):
+    return "{" + ','.join(key_transforms) + "}"
+
+
+def mysql_compile_json_path(key_transforms):
+    path = ['$']
+    for key_transform in key_transforms:
+        try:
+            num = int(key_transform)
+            path.append('[{}]'.format(num))
+        except ValueError:  # non-integer
+            path.append('.')
+            path.append(key_transform)
+    return ''.join(path)
+
+
+def sqlite_compile_json_path(key_transforms):
+    path = ['$']
+    for key_transform in key_transforms:
+        try:
+            num = int(key_transform)
+            path.append('[{}]'.format(num))
+        except ValueError:  # non-integer
+            path.append('.')
+            path.append(json.dumps(key_transform))
+    return ''.join(path)
+
+
+def is_scalar(value):
+    return isinstance(value, (str, int, float))
+
+
+def encode_array(adapters):
+    """
+    Encodes the values of ``JsonAdapter`` instances as one JSON array.
+    """
+    return '[{}]'.format(', '.join(a.dumps(a.adapted) for a in adapters))
+
+
+def memoize_path(compile_json_path):
+    """
+    Wraps a path compiler in a bounded cache. The wrapped function has to be called
+    with a tuple of keys.
+    """
+    return staticmethod(lru_cache(maxsize=4096)(compile_json_path))
+
+
+def decode_scalar_params(params):
+    """
+    Turns JSON-encoded lookup parameters back into plain values, so that they can
+    be compared to scalars extracted from a document. Objects and arrays stay
+    encoded.
+    """
+    decoded = []
+    for p in params:
+        val = json.loads(p)
+        if isinstance(val, (list, dict)):
+            val = json.dumps(val)
+        decoded.append(val)
+    return decoded
+
+
+def normalized_dumps(value, encoder):
+    """
+    Encodes ``value`` the way PostgreSQL (jsonb) and MySQL print the documents they
+    store: keys ordered by length and then bytes, non-ASCII characters unescaped.
+    Values they print differently, e.g. some floats, just never compare equal.
+    """
+    def normalize(obj):
+        if isinstance(obj, dict):
+            items = [(key if isinstance(key, str) else json.dumps(key), normalize(val)) for key, val in obj.items()]
+            items.sort(key=lambda item: (len(item[0].encode()), item[0].encode()))
+            return dict(items)
+        if isinstance(obj, (list, tuple)):
+            return [normalize(val) for val in obj]
+        return obj
+
+    return json.dumps(normalize(value), cls=encoder, ensure_ascii=False)
+
+
+class TextBackend:
+    """
+    Stores JSON as plain text and supports no querying. This is the fallback
+    for every database we don't know better about.
+
+    A backend instance holds everything that differs between databases, so
+    that fields, lookups and functions never have to inspect the connection
+    settings themselves. Use ``get_backend()`` to obtain the instance for a
+    connection.
+    """
+    name = 'text'
+    # Whether the database driver handles (de)serialization itself
+    native = False
+    # Whether comparisons on keys need the unquoted (->>) value instead of the JSON one
+    compare_key_text = False
+    # Whether JSONPathIndex creates generated columns that lookups can compare instead
+    path_index_columns = False
+    # Whether documents are stored as text, which FallbackJSONField(compression=...) compresses
+    compressible = True
+
+    def __init__(self, connection):
+        self.engine = connection.settings_dict['ENGINE']
+
+    def compile_json_path(self, key_transforms):
+        raise self.not_supported('JSON paths are')
+
+    def db_type(self, field, connection):
+        data = field.db_type_parameters(connection)
+        try:
+            return connection.data_types["BinaryField" if field.compression else "TextField"] % data
+        except KeyError:
+            return None
+
+    def get_db_prep_value(self, value, compressor=None):
+        if value is None:
+            return None
+        value = value.dumps(value.adapted)
+        if compressor is not None and self.compressible:
+            return compressor.compress(value)
+        return value
+
+    def decoder(self, codec, compressor=None, proxy=None, field=None, alias=None):
+        """
+        Returns a function turning values read from the database into documents, or
+        into ``proxy`` instances if given, or ``None`` if values need no conversion.
+        Its signature is that of ``from_db_value()``, so fields can use it as the
+        query result converter directly. Documents decoded for ``field`` are recorded
+        in ``loaded_documents`` with the fingerprint of their text and the ``alias``
+        of the database they were read from.
+        """
+        decompress = None
+        if compressor is not None and self.compressible:
+            decompress = compressor.decompress
+        if proxy is None and field is not None:
+            loads, key, attname = codec.decode, id(field), field.attname
+
+            def decode(value, expression=None, connection=None):
+                if value is None:
+                    return None
+                if decompress is not None:
+                    value = decompress(value)
+                document = loads(value)
+                loaded_documents.documents[key] = (attname, document, fingerprint(value), alias)
+                return document
+            return decode
+        if proxy is not None:
+            def loads(value):
+                return proxy(value, codec)
+        else:
+            loads = codec.decode
+        if decompress is not None:
+            def decode(value, expression=None, connection=None):
+                return None if value is None else loads(decompress(value))
+        else:
+            def decode(value, expression=None, connection=None):
+                return None if value is None else loads(value)
+        return decode
+
+    def stored_text(self, field, value):
+        """
+        The text the database returns for ``value`` once ``field`` wrote it, which is
+        compared with the fingerprint of the document loaded before. Databases
+        normalizing documents return them in their own form.
+        """
+        return field.json_codec.dumps(value, field.encoder, field.encoding_profile)
+
+    def select_format(self, field, sql, params):
+        return sql, params
+
+    def get_placeholder(self, field):
+        return '%s'
+
+    def not_supported(self, what='Lookup'):
+        return NotSupportedError('{} not supported for {}'.format(what, self.engine))
+
+    def contains_sql(self, lhs, lhs_params, rhs, rhs_params):
+        raise self.not_supported()
+
+    def contained_by_sql(self, lhs, lhs_params, rhs, rhs_params):
+        raise self.not_supported()
+
+    def has_keys_sql(self, lhs, lhs_params, keys, any_key=False):
+        raise self.not_supported()
+
+    def member_of_sql(self, lhs, lhs_params, rhs_param):
+        return self.overlaps_sql(lhs, lhs_params, rhs_param)
+
+    def overlaps_sql(self, lhs, lhs_params, rhs_param):
+        """
+        Whether the array ``lhs`` has an element in common with the list adapted by
+        ``rhs_param``, as one containment check per element.
+        """
+        parts = [
+            self.contains_sql(lhs, lhs_params, '%s', [
+                type(rhs_param)([value], encoder=rhs_param.encoder, codec=rhs_param.codec, profile=rhs_param.profile)
+            ])
+            for value in rhs_param.adapted
+        ]
+        sql = ' OR '.join('({})'.format(sql) for sql, params in parts)
+        return '({})'.format(sql), [p for sql, params in parts for p in params]
+
+    def key_transform_sql(self, lhs, params, key_transforms, as_text=False):
+        raise NotSupportedError(
+            'Transforms on JSONFields are only supported on PostgreSQL, MySQL and SQLite at the moment.'
+        )
+
+    # Templates casting the text value at a key path, by the name of the cast transform
+    key_casts = {}
+
+    def key_cast_sql(self, lhs, params, key_transforms, cast):
+        """
+        The value at a key path, cast to one of the types of ``key_casts``.
+        """
+        value, params = self.key_transform_sql(lhs, params, key_transforms, as_text=True)
+        template = self.key_casts[cast]
+        return template.format(value=value), params * template.count('{value}')
+
+    def functions_not_supported(self):
+        return NotSupportedError(
+            'Functions on JSONFields are only supported on PostgreSQL, MySQL and SQLite at the moment.'
+        )
+
+    def extract_sql(self, lhs, params, path):
+        raise self.functions_not_supported()
+
+    def set_key_sql(self, lhs, params, path, value):
+        raise self.functions_not_supported()
+
+    def remove_key_sql(self, lhs, params, path):
+        raise self.functions_not_supported()
+
+    def merge_sql(self, lhs, params, value):
+        raise self.functions_not_supported()
+
+    def array_length_sql(self, lhs, params, path):
+        """
+        The number of elements of the array at ``path``, or ``NULL`` if there is no
+        array at the path.
+        """
+        raise self.functions_not_supported()
+
+    def array_elements_join_sql(self, lhs, params, path, alias):
+        """
+        A join clause adding one row per element of the array at ``path``.
+        Documents without an array at the path get no rows.
+        """
+        raise self.functions_not_supported()
+
+    def array_element_sql(self, lhs, params, path, alias):
+        """
+        The current element of a join from ``array_elements_join_sql``, as JSON.
+        """
+        raise self.functions_not_supported()
+
+    def json_argument_sql(self, sql, params):
+        """
+        A document or extracted value, marked as JSON for functions that would
+        otherwise encode it as a string.
+        """
+        return sql, params
+
+    def json_text_sql(self, sql, params):
+        """
+        A JSON string as plain text.
+        """
+        raise self.functions_not_supported()
+
+    def array_agg_function(self):
+        raise self.functions_not_supported()
+
+    def object_agg_function(self):
+        raise self.functions_not_supported()
+
+    def object_function(self):
+        """
+        The function building a JSON object from alternating keys and values.
+        """
+        raise self.functions_not_supported()
+
+    def build_object_sql(self, items):
+        """
+        A JSON object from ``(key, sql, params)`` items.
+        """
+        sql = ', '.join('%s, {}'.format(value) for key, value, params in items)
+        params = [p for key, value, value_params in items for p in [key] + value_params]
+        return '{}({})'.format(self.object_function(), sql), params
+
+    def exact_lhs(self, lhs, lhs_params):
+        return lhs, lhs_params
+
+    def exact_rhs(self, compiler, connection, rhs, rhs_params):
+        return rhs, rhs_params
+
+    def key_exact_rhs(self, compiler, connection, rhs, rhs_params):
+        return rhs, rhs_params
+
+    def key_text_rhs(self, rhs, rhs_params):
+        return rhs, rhs_params
+
+    def key_value_rhs(self, rhs, rhs_params):
+        return rhs, rhs_params
+
+    # Number of values from which key__in lookups pass them as one array
+    value_list_size = 100
+
+    def key_in_sql(self, lhs, params, key_transforms, values):
+        """
+        Compares the value at a key path against the values of the ``JsonAdapter``
+        instances in ``values`` in a single parameter, or returns ``None`` to compare
+        them one by one.
+        """
+        return None
+
+    def case_insensitive(self, sql, params):
+        return sql, params
+
+    def path_index_sql(self, schema_editor, model, index):
+        return None
+
+    def remove_path_index_sql(self, schema_editor, model, index):
+        return None
+
+    def array_index_sql(self, schema_editor, model, index):
+        return None
+
+    def remove_array_index_sql(self, schema_editor, model, index):
+        return None
+
+    def search_sql(self, compiler, lhs, params, key_transforms, words, index=None, col=None):
+        """
+        Matches documents with all ``words`` in the string at a key path, using the
+        ``JSONSearchIndex`` on the path if there is one. Without an index, each word
+        is matched as a substring.
+        """
+        connection = compiler.connection
+        value, value_params = self.case_insensitive(*self.key_transform_sql(lhs, params, key_transforms, as_text=True))
+        rhs, _ = self.case_insensitive('%s', [])
+        condition = '{} {}'.format(value, connection.operators['icontains'] % rhs)
+        sql = ' AND '.join(condition for _ in words)
+        params = [
+            p for word in words for p in value_params + ['%{}%'.format(connection.ops.prep_for_like_query(word))]
+        ]
+        return '({})'.format(sql), params
+
+    def search_index_sql(self, schema_editor, model, index):
+        """
+        The statements creating a ``JSONSearchIndex``, or ``None`` to skip it.
+        """
+        return None
+
+    def remove_search_index_sql(self, schema_editor, model, index):
+        return None
+
+
+class SQLiteContainment:
+    """
+    Compiles containment between a document in the database and a known JSON value
+    into nested ``json_type``, ``json_extract`` and ``json_each`` conditions.
+
+    Positions inside the document are passed around as ``(sql, params)`` pairs that
+    evaluate to a JSON path, since elements found through ``json_each`` are only
+    known by their ``fullkey`` column.
+    """
+
+    def __init__(self, doc, doc_params):
+        self.doc = doc
+        self.doc_params = doc_params
+        self.aliases = 0
+
+    def alias(self):
+        self.aliases += 1
+        return 'jf{}'.format(self.aliases)
+
+    def child(self, node, key):
+        sql, params = node
+        suffix = '.{}'.format(json.dumps(key))
+        if sql == '%s':
+            return sql, [params[0] + suffix]
+        return '{} || %s'.format(sql), params + [suffix]
+
+    def type_is(self, node, types):
+        sql = "IFNULL(json_type({}, {}), '') IN ({})".format(self.doc, node[0], ', '.join("'%s'" % t for t in types))
+        return sql, self.doc_params + node[1]
+
+    def scalar(self, node, value):
+        if value is None:
+            return self.type_is(node, ['null'])
+        elif value is True:
+            return self.type_is(node, ['true'])
+        elif value is False:
+            return self.type_is(node, ['false'])
+        elif isinstance(value, (int, float)):
+            type_sql, params = self.type_is(node, ['integer', 'real'])
+        else:
+            type_sql, params = self.type_is(node, ['text'])
+        sql = '{} AND json_extract({}, {}) = %s'.format(type_sql, self.doc, node[0])
+        return sql, params + self.doc_params + node[1] + [value]
+
+    def each(self, node, alias, condition):
+        sql = 'SELECT 1 FROM json_each({}, {}) AS {} WHERE {}'.format(self.doc, node[0], alias, condition[0])
+        return sql, self.doc_params + node[1] + condition[1]
+
+    def contains(self, node, value):
+        if isinstance(value, dict):
+            parts = [self.type_is(node, ['object'])]
+            for key, val in value.items():
+                parts.append(self.contains(self.child(node, key), val))
+        elif isinstance(value, list):
+            parts = [self.type_is(node, ['array'])]
+            for val in value:
+                alias = self.alias()
+                sql, params = self.each(node, alias, self.contains(('{}.fullkey'.format(alias), []), val))
+                parts.append(('EXISTS ({})'.format(sql), params))
+        else:
+            return self.scalar(node, value)
+        return self.join(parts, ' AND ')
+
+    def contained_by(self, node, value):
+        if isinstance(value, dict):
+            type_sql = self.type_is(node, ['object'])
+            alias = self.alias()
+            element = ('{}.fullkey'.format(alias), [])
+            alternatives = []
+            for key, val in value.items():
+                sql, params = self.contained_by(element, val)
+                alternatives.append(('{}.key = %s AND {}'.format(alias, sql), [key] + params))
+        elif isinstance(value, list):
+            type_sql = self.type_is(node, ['array'])
+            alias = self.alias()
+            element = ('{}.fullkey'.format(alias), [])
+            alternatives = [self.contained_by(element, val) for val in value]
+        else:
+            return self.scalar(node, value)
+        condition = self.join(alternatives, ' OR ') if alternatives else ('0', [])
+        sql, params = self.each(node, alias, ('NOT ({})'.format(condition[0]), condition[1]))
+        return '{} AND NOT EXISTS ({})'.format(type_sql[0], sql), type_sql[1] + params
+
+    def join(self, parts, connector):
+        return (
+            connector.join('({})'.format(sql) for sql, params in parts),
+            [p for sql, params in parts for p in params]
+        )
+
+
+class SQLiteBackend(TextBackend):
+    """
+    Queries documents through the JSON1 functions of SQLite 3.38+. Like on
+    PostgreSQL, key transforms evaluate to JSON (``->``) and text transforms to
+    plain SQL values (``->>``).
+    """
+    name = 'sqlite'
+    compare_key_text = True
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        # The binary JSONB format, which all JSON functions accept as input
+        self.jsonb = connection.Database.sqlite_version_info >= (3, 45)
+
+    compile_json_path = memoize_path(sqlite_compile_json_path)
+
+    def stores_jsonb(self, field):
+        return self.jsonb and field.binary and not field.compression
+
+    def db_type(self, field, connection):
+        if self.stores_jsonb(field):
+            return connection.data_types['BinaryField']
+        return super().db_type(field, connection)
+
+    def select_format(self, field, sql, params):
+        if self.stores_jsonb(field):
+            return 'json({})'.format(sql), params
+        return sql, params
+
+    def stored_text(self, field, value):
+        if not self.stores_jsonb(field):
+            return super().stored_text(field, value)
+        # json() keeps the order of keys and the escapes of strings, but drops spaces
+        profile = field.encoding_profile
+        return field.json_codec.dumps(value, field.encoder, EncodingProfile(
+            separators=(',', ':'), sort_keys=profile.sort_keys, ensure_ascii=profile.ensure_ascii
+        ))
+
+    def get_placeholder(self, field):
+        # Also applied to expressions assigned in updates, e.g. JSONSet
+        if self.stores_jsonb(field):
+            return 'jsonb(%s)'
+        return '%s'
+
+    def contains_sql(self, lhs, lhs_params, rhs, rhs_params):
+        value = json.loads(rhs_params[0].dumps(rhs_params[0].adapted))
+        return SQLiteContainment(lhs, lhs_params).contains(('%s', ['$']), value)
+
+    def contained_by_sql(self, lhs, lhs_params, rhs, rhs_params):
+        value = json.loads(rhs_params[0].dumps(rhs_params[0].adapted))
+        return SQLiteContainment(lhs, lhs_params).contained_by(('%s', ['$']), value)
+
+    def has_keys_sql(self, lhs, lhs_params, keys, any_key=False):
+        sql = ' OR ' if any_key else ' AND '
+        params = []
+        for key_name in keys:
+            params += lhs_params + ['$.{}'.format(json.dumps(key_name))]
+        return '({})'.format(sql.join('json_type({}, %s) IS NOT NULL'.format(lhs) for _ in keys)), params
+
+    def key_transform_sql(self, lhs, params, key_transforms, as_text=False):
+        operator = '->>' if as_text else '->'
+        return '({} {} %s)'.format(lhs, operator), params + [self.compile_json_path(key_transforms)]
+
+    # ->> returns numbers and booleans as SQL values already
+    key_casts = {
+        'int': 'CAST({value} AS INTEGER)',
+        'float': 'CAST({value} AS REAL)',
+        'decimal': 'CAST({value} AS NUMERIC)',
+        'date': 'date({value})',
+        'text': '{value}',
+    }
+
+    def key_cast_sql(self, lhs, params, key_transforms, cast):
+        if cast == 'bool':
+            # ->> returns true as 1, which could also be a number
+            value, params = self.key_transform_sql(lhs, params, key_transforms)
+            return "CASE {} WHEN 'true' THEN 1 WHEN 'false' THEN 0 END".format(value), params
+        return super().key_cast_sql(lhs, params, key_transforms, cast)
+
+    def extract_sql(self, lhs, params, path):
+        return '({} -> %s)'.format(lhs), params + [self.compile_json_path(path)]
+
+    def set_key_sql(self, lhs, params, path, value):
+        return 'json_set({}, %s, json(%s))'.format(lhs), params + [self.compile_json_path(path), value]
+
+    def remove_key_sql(self, lhs, params, path):
+        return 'json_remove({}, %s)'.format(lhs), params + [self.compile_json_path(path)]
+
+    def merge_sql(self, lhs, params, value):
+        return 'json_patch({}, %s)'.format(lhs), params + [value]
+
+    def array_length_sql(self, lhs, params, path):
+        # json_array_length() is 0 for anything but arrays
+        sql = "CASE WHEN json_type({lhs}, %s) = 'array' THEN json_array_length({lhs}, %s) END".format(lhs=lhs)
+        path = self.compile_json_path(path)
+        return sql, params + [path] + params + [path]
+
+    def array_elements_join_sql(self, lhs, params, path, alias):
+        # json_each() would also walk objects, so the join is restricted to arrays
+        path = self.compile_json_path(path)
+        sql = "INNER JOIN json_each({lhs}, %s) AS {alias} ON json_type({lhs}, %s) = 'array'".format(
+            lhs=lhs, alias=alias
+        )
+        return sql, params + [path] + params + [path]
+
+    def array_element_sql(self, lhs, params, path, alias):
+        # json_each() returns scalars as SQL values, so the element is read back as JSON
+        return '({} -> {}.fullkey)'.format(lhs, alias), params
+
+    def json_argument_sql(self, sql, params):
+        return 'json({})'.format(sql), params
+
+    def json_text_sql(self, sql, params):
+        return "({} ->> '$')".format(sql), params
+
+    def array_agg_function(self):
+        return 'json_group_array'
+
+    def object_agg_function(self):
+        return 'json_group_object'
+
+    def object_function(self):
+        return 'json_object'
+
+    def exact_lhs(self, lhs, lhs_params):
+        return 'json({})'.format(lhs), lhs_params
+
+    def exact_rhs(self, compiler, connection, rhs, rhs_params):
+        return 'json({})'.format(rhs), rhs_params
+
+    def key_exact_rhs(self, compiler, connection, rhs, rhs_params):
+        return 'json({})'.format(rhs), rhs_params
+
+    def key_value_rhs(self, rhs, rhs_params):
+        return rhs, decode_scalar_params(rhs_params)
+
+    def key_in_sql(self, lhs, params, key_transforms, values):
+        # Above the limit on parameters of old SQLite versions, the values are
+        # passed as one JSON array. ->> and json_each() both return scalars as SQL values.
+        if len(values) < self.value_list_size or not all(is_scalar(v.adapted) for v in values):
+            return None
+        sql, params = self.key_transform_sql(lhs, params, key_transforms, as_text=True)
+        return '{} IN (SELECT value FROM json_each(%s))'.format(sql), params + [encode_array(values)]
+
+    def search_sql(self, compiler, lhs, params, key_transforms, words, index=None, col=None):
+        if index is None:
+            return super().search_sql(compiler, lhs, params, key_transforms, words)
+        qn = compiler.connection.ops.quote_name
+        pk = '{}.{}'.format(compiler.quote_name_unless_alias(col.alias), qn(col.target.model._meta.pk.column))
+        # Every word as an FTS5 string, so that the words are matched literally
+        query = ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+        return '{} IN (SELECT rowid FROM {table} WHERE {table} MATCH %s)'.format(pk, table=qn(index.column)), [query]
+
+    def search_index_sql(self, schema_editor, model, index):
+        # An FTS5 table holding the strings at the path by primary key, kept up to
+        # date by triggers. It is kept when Django rebuilds the table, which drops
+        # the triggers, so only rows missing from it are copied.
+        qn = schema_editor.quote_name
+        field = model._meta.get_field(index.fields[0])
+        names = {
+            'fts': qn(index.column),
+            'pk': qn(model._meta.pk.column),
+            'column': qn(field.column),
+            'path': schema_editor.quote_value(self.compile_json_path(index.path)),
+        }
+        copy = (
+            "INSERT INTO {fts}(rowid, value) SELECT {row}.{pk}, {row}.{column} ->> {path}{source} "
+            "WHERE json_type({row}.{column}, {path}) = 'text'"
+        )
+        copy_new = copy.format(row='new', source='', **names)
+        delete_old = 'DELETE FROM {fts} WHERE rowid = old.{pk}'.format(**names)
+        triggers = (
+            ('ai', 'AFTER INSERT', [copy_new]),
+            ('au', 'AFTER UPDATE OF {column}'.format(**names), [delete_old, copy_new]),
+            ('ad', 'AFTER DELETE', [delete_old]),
+        )
+        statements = ['CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(value)'.format(**names)]
+        for suffix, event, actions in triggers:
+            trigger = qn('{}_{}'.format(index.name, suffix))
+            statements.append('DROP TRIGGER IF EXISTS {}'.format(trigger))
+            statements.append(Statement(
+                'CREATE TRIGGER %(trigger)s {} ON %(table)s BEGIN {}; END'.format(event, '; '.join(actions)),
+                trigger=trigger,
+                table=Table(model._meta.db_table, qn),
+            ))
+        statements.append(Statement(
+            copy.format(row='t', source=' FROM %(table)s t', **names) + ' AND t.{pk} NOT IN (SELECT rowid FROM {fts})'.format(**names),
+            table=Table(model._meta.db_table, qn),
+        ))
+        return statements
+
+    def remove_search_index_sql(self, schema_editor, model, index):
+        qn = schema_editor.quote_name
+        statements = ['DROP TRIGGER IF EXISTS {}'.format(qn('{}_{}'.format(index.name, suffix))) for suffix in ('ai', 'au', 'ad')]
+        return statements + ['DROP TABLE IF EXISTS {}'.format(qn(index.column))]
+
+
+class PostgresBackend(TextBackend):
+    """
+    PostgreSQL has a native jsonb type and all lookups are implemented by
+    ``django.contrib.postgres``, so this backend mostly stays out of the way.
+    """
+    name = 'postgres'
+    native = True
+    compressible = False
+
+    def db_type(self, field, connection):
+        return 'jsonb'
+
+    def get_db_prep_value(self, value, compressor=None):
+        return value
+
+    def decoder(self, codec, compressor=None, proxy=None, field=None, alias=None):
+        decode_text = super().decoder(codec, proxy=proxy, field=field, alias=alias)
+
+        def decode(value, expression=None, connection=None):
+            # Documents are selected as text, see select_format(), but psycopg2 still
+            # decodes jsonb itself in raw queries
+            if isinstance(value, str):
+                return decode_text(value)
+            return value
+        return decode
+
+    def select_format(self, field, sql, params):
+        return '({})::text'.format(sql), params
+
+    def stored_text(self, field, value):
+        return normalized_dumps(value, field.encoder)
+
+    compile_json_path = memoize_path(postgres_compile_json_path)
+
+    def contains_sql(self, lhs, lhs_params, rhs, rhs_params):
+        return '{} @> {}'.format(lhs, rhs), lhs_params + rhs_params
+
+    def key_transform_sql(self, lhs, params, key_transforms, as_text=False):
+        if len(key_transforms) > 1:
+            operator = '#>>' if as_text else '#>'
+            return '({} {} %s)'.format(lhs, operator), params + [list(key_transforms)]
+        try:
+            lookup = int(key_transforms[0])
+        except ValueError:
+            lookup = key_transforms[0]
+        operator = '->>' if as_text else '->'
+        return '({} {} %s)'.format(lhs, operator), params + [lookup]
+
+    # Same expressions as the ones of typed JSONPathIndex indexes
+    key_casts = {
+        'int': '({value})::integer',
+        'float': '({value})::double precision',
+        'decimal': '({value})::numeric',
+        'bool': '({value})::boolean',
+        'date': '({value})::date',
+        'text': '{value}',
+    }
+
+    def extract_sql(self, lhs, params, path):
+        return '{} #> %s'.format(lhs), params + [self.compile_json_path(path)]
+
+    def key_in_sql(self, lhs, params, key_transforms, values):
+        if all(isinstance(v.adapted, str) for v in values):
+            # The same expression as a JSONPathIndex on the path, restricted to JSON
+            # strings as ->> returns other scalars as text as well
+            text, text_params = self.key_transform_sql(lhs, params, key_transforms, as_text=True)
+            value, value_params = self.key_transform_sql(lhs, params, key_transforms)
+            sql = "({} = ANY(%s) AND jsonb_typeof({}) = 'string')".format(text, value)
+            return sql, text_params + [[v.adapted for v in values]] + value_params
+        sql, params = self.key_transform_sql(lhs, params, key_transforms)
+        return '{} = ANY(%s::jsonb[])'.format(sql), params + [[v.dumps(v.adapted) for v in values]]
+
+    def set_key_sql(self, lhs, params, path, value):
+        return 'jsonb_set({}, %s, %s::jsonb)'.format(lhs), params + [self.compile_json_path(path), value]
+
+    def remove_key_sql(self, lhs, params, path):
+        return '({} #- %s)'.format(lhs), params + [self.compile_json_path(path)]
+
+    def merge_sql(self, lhs, params, value):
+        return '({} || %s::jsonb)'.format(lhs), params + [value]
+
+    def array_length_sql(self, lhs, params, path):
+        # jsonb_array_length() raises on anything but arrays
+        value, params = self.extract_sql(lhs, params, path) if path else (lhs, params)
+        sql = "CASE WHEN jsonb_typeof({value}) = 'array' THEN jsonb_array_length({value}) END".format(value=value)
+        return sql, params + params
+
+    def array_elements_join_sql(self, lhs, params, path, alias):
+        # jsonb_array_elements() raises on anything but arrays and returns no rows for NULL
+        path = self.compile_json_path(path)
+        sql = (
+            "CROSS JOIN LATERAL jsonb_array_elements("
+            "CASE WHEN jsonb_typeof({lhs} #> %s) = 'array' THEN {lhs} #> %s END"
+            ") AS {alias}(value)"
+        ).format(lhs=lhs, alias=alias)
+        return sql, params + [path] + params + [path]
+
+    def array_element_sql(self, lhs, params, path, alias):
+        return '{}.value'.format(alias), []
+
+    def json_text_sql(self, sql, params):
+        return "({} #>> '{{}}')".format(sql), params
+
+    def array_agg_function(self):
+        return 'jsonb_agg'
+
+    def object_agg_function(self):
+        return 'jsonb_object_agg'
+
+    def object_function(self):
+        return 'jsonb_build_object'
+
+    def path_index_sql(self, schema_editor, model, index):
+        # An expression index on the same SQL as KeyTextTransform, optionally cast like
+        # Cast(KeyTextTransform(...), output_field), so the planner matches both.
+        field = model._meta.get_field(index.fields[0])
+        sql, params = self.key_transform_sql(schema_editor.quote_name(field.column), [], index.path, as_text=True)
+        expression = sql % tuple(schema_editor.quote_value(p) for p in params)
+        if index.value_type != 'text':
+            expression = '({})::{}'.format(expression, index.output_field.db_type(schema_editor.connection))
+        return Statement(
+            'CREATE INDEX %(name)s ON %(table)s (%(expression)s)',
+            name=schema_editor.quote_name(index.name),
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            expression=expression,
+        )
+
+    def remove_path_index_sql(self, schema_editor, model, index):
+        return schema_editor._delete_index_sql(model, index.name)
+
+    def array_index_sql(self, schema_editor, model, index):
+        # member_of and overlaps are containment checks on the array here
+        field = model._meta.get_field(index.fields[0])
+        sql, params = self.key_transform_sql(schema_editor.quote_name(field.column), [], index.path)
+        return Statement(
+            'CREATE INDEX %(name)s ON %(table)s USING gin (%(expression)s jsonb_path_ops)',
+            name=schema_editor.quote_name(index.name),
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            expression=sql % tuple(schema_editor.quote_value(p) for p in params),
+        )
+
+    def remove_array_index_sql(self, schema_editor, model, index):
+        return schema_editor._delete_index_sql(model, index.name)
+
+    def search_sql(self, compiler, lhs, params, key_transforms, words, index=None, col=None):
+        # The same expression as a JSONSearchIndex, with its text search configuration
+        config = index.config if index is not None else 'simple'
+        value, params = self.key_transform_sql(lhs, params, key_transforms, as_text=True)
+        sql = 'to_tsvector(%s::regconfig, {}) @@ plainto_tsquery(%s::regconfig, %s)'.format(value)
+        return sql, [config] + params + [config, ' '.join(words)]
+
+    def search_index_sql(self, schema_editor, model, index):
+        field = model._meta.get_field(index.fields[0])
+        sql, params = self.key_transform_sql(schema_editor.quote_name(field.column), [], index.path, as_text=True)
+        return [Statement(
+            'CREATE INDEX %(name)s ON %(table)s USING gin (to_tsvector(%(config)s::regconfig, %(expression)s))',
+            name=schema_editor.quote_name(index.name),
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            config=schema_editor.quote_value(index.config),
+            expression=sql % tuple(schema_editor.quote_value(p) for p in params),
+        )]
+
+    def remove_search_index_sql(self, schema_editor, model, index):
+        return [schema_editor._delete_index_sql(model, index.name)]
+
+
+class MySQLBackend(TextBackend):
+    name = 'mysql'
+    path_index_columns = True
+    compressible = False
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        # MEMBER OF, JSON_OVERLAPS and multi-valued indexes
+        self.multi_valued = self.supports_multi_valued(connection)
+        self.json_table = self.supports_json_table(connection)
+
+    def supports_multi_valued(self, connection):
+        return connection.mysql_version >= (8, 0, 17)
+
+    def supports_json_table(self, connection):
+        return connection.mysql_version >= (8, 0, 4)
+
+    def stored_text(self, field, value):
+        return normalized_dumps(value, field.encoder)
+
+    compile_json_path = memoize_path(mysql_compile_json_path)
+
+    # Generated column expressions for JSONPathIndex. Values of another JSON type
+    # are NULL, so that comparisons on the column match the ones on the document.
+    path_index_expressions = {
+        'text': "CASE WHEN JSON_TYPE({value}) = 'STRING' THEN JSON_UNQUOTE({value}) END",
+        'integer': "CASE WHEN JSON_TYPE({value}) IN ('INTEGER', 'UNSIGNED INTEGER') THEN {value} END",
+        'number': (
+            "CASE WHEN JSON_TYPE({value}) IN ('INTEGER', 'UNSIGNED INTEGER', 'DOUBLE', 'DECIMAL') "
+            "THEN {value} END"
+        ),
+        'boolean': "CASE WHEN JSON_TYPE({value}) = 'BOOLEAN' THEN JSON_UNQUOTE({value}) = 'true' END",
+    }
+
+    def db_type(self, field, connection):
+        return 'json'
+
+    def json_value_sql(self, compiler, connection, value):
+        return JSONValue(value).as_sql(compiler, connection)
+
+    def contains_sql(self, lhs, lhs_params, rhs, rhs_params):
+        rhs_params = [p.dumps(p.adapted) for p in rhs_params]  # Convert JSONAdapter to str
+        return 'JSON_CONTAINS({}, {})'.format(lhs, rhs), lhs_params + rhs_params
+
+    def contained_by_sql(self, lhs, lhs_params, rhs, rhs_params):
+        rhs_params = [p.dumps(p.adapted) for p in rhs_params]  # Convert JSONAdapter to str
+        return 'JSON_CONTAINS({}, {})'.format(rhs, lhs), rhs_params + lhs_params
+
+    def has_keys_sql(self, lhs, lhs_params, keys, any_key=False):
+        paths = [
+            '$.{}'.format(json.dumps(key_name))
+            for key_name in keys
+        ]
+        sql = ['JSON_CONTAINS_PATH(', lhs, ", 'one', " if any_key else ", 'all', "]
+        sql.append(', '.join('%s' for _ in paths))
+        sql.append(')')
+        return ''.join(sql), lhs_params + paths
+
+    def member_of_sql(self, lhs, lhs_params, rhs_param):
+        if not self.multi_valued:
+            return super().member_of_sql(lhs, lhs_params, rhs_param)
+        value = rhs_param.adapted[0]
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return '%s MEMBER OF({})'.format(lhs), [value] + lhs_params
+        return 'CAST(%s AS JSON) MEMBER OF({})'.format(lhs), [rhs_param.dumps(value)] + lhs_params
+
+    def overlaps_sql(self, lhs, lhs_params, rhs_param):
+        if not self.multi_valued:
+            return super().overlaps_sql(lhs, lhs_params, rhs_param)
+        return 'JSON_OVERLAPS({}, CAST(%s AS JSON))'.format(lhs), lhs_params + [rhs_param.dumps(rhs_param.adapted)]
+
+    def key_transform_sql(self, lhs, params, key_transforms, as_text=False):
+        return 'JSON_EXTRACT({}, %s)'.format(lhs), params + [self.compile_json_path(key_transforms)]
+
+    # JSON_EXTRACT() returns JSON, so strings are unquoted first
+    key_casts = {
+        'int': 'CAST(JSON_UNQUOTE({value}) AS SIGNED)',
+        'float': '(JSON_UNQUOTE({value}) + 0.0)',
+        'decimal': 'CAST(JSON_UNQUOTE({value}) AS DECIMAL(65, 30))',
+        'bool': "CASE WHEN JSON_TYPE({value}) = 'BOOLEAN' THEN JSON_UNQUOTE({value}) = 'true' END",
+        'date': 'CAST(JSON_UNQUOTE({value}) AS DATE)',
+        'text': "CASE WHEN JSON_TYPE({value}) = 'STRING' THEN JSON_UNQUOTE({value}) END",
+    }
+
+    def extract_sql(self, lhs, params, path):
+        return 'JSON_EXTRACT({}, %s)'.format(lhs), params + [self.compile_json_path(path)]
+
+    def json_param_sql(self):
+        # A parameter holding encoded JSON, as a JSON value
+        return 'CAST(%s AS JSON)'
+
+    def set_key_sql(self, lhs, params, path, value):
+        sql = 'JSON_SET({}, %s, {})'.format(lhs, self.json_param_sql())
+        return sql, params + [self.compile_json_path(path), value]
+
+    def remove_key_sql(self, lhs, params, path):
+        return 'JSON_REMOVE({}, %s)'.format(lhs), params + [self.compile_json_path(path)]
+
+    def merge_sql(self, lhs, params, value):
+        return 'JSON_MERGE_PATCH({}, {})'.format(lhs, self.json_param_sql()), params + [value]
+
+    def array_length_sql(self, lhs, params, path):
+        # JSON_LENGTH() counts the keys of objects and is 1 for scalars
+        sql = "CASE WHEN JSON_TYPE(JSON_EXTRACT({lhs}, %s)) = 'ARRAY' THEN JSON_LENGTH({lhs}, %s) END".format(lhs=lhs)
+        path = self.compile_json_path(path)
+        return sql, params + [path] + params + [path]
+
+    def array_elements_join_sql(self, lhs, params, path, alias):
+        if not self.json_table:
+            raise NotSupportedError('JSONArrayElements requires JSON_TABLE() of MySQL 8.0.4+ or MariaDB 10.6+.')
+        # The row path of JSON_TABLE() has to be a literal and [*] would wrap
+        # scalars and objects, so the array is extracted beforehand.
+        path = self.compile_json_path(path)
+        sql = (
+            "CROSS JOIN JSON_TABLE("
+            "IF(JSON_TYPE(JSON_EXTRACT({lhs}, %s)) = 'ARRAY', JSON_EXTRACT({lhs}, %s), NULL), "
+            "'$[*]' COLUMNS (`value` JSON PATH '$')"
+            ") AS {alias}"
+        ).format(lhs=lhs, alias=alias)
+        return sql, params + [path] + params + [path]
+
+    def array_element_sql(self, lhs, params, path, alias):
+        return '{}.`value`'.format(alias), []
+
+    def json_text_sql(self, sql, params):
+        return 'JSON_UNQUOTE({})'.format(sql), params
+
+    def array_agg_function(self):
+        return 'JSON_ARRAYAGG'
+
+    def object_agg_function(self):
+        return 'JSON_OBJECTAGG'
+
+    def object_function(self):
+        return 'JSON_OBJECT'
+
+    def exact_rhs(self, compiler, connection, rhs, rhs_params):
+        func_params = []
+        new_params = []
+        for p in rhs_params:
+            if not hasattr(p, '_prepare') and p is not None:
+                func, this_func_param = self.json_value_sql(compiler, connection, p)
+                func_params.append(func)
+                new_params += this_func_param
+            else:
+                func_params.append(p)
+        return rhs % tuple(func_params), new_params
+
+    def key_exact_rhs(self, compiler, connection, rhs, rhs_params):
+        func_params = []
+        new_params = []
+        for p in rhs_params:
+            val = json.loads(p)
+            if isinstance(val, (list, dict)):
+                func, this_func_param = self.json_value_sql(compiler, connection, json.dumps(val))
+                func_params.append(func)
+                new_params += this_func_param
+            else:
+                func_params.append('%s')
+                new_params.append(val)
+        if rhs_params:
+            rhs = rhs % tuple(func_params)
+        return rhs, new_params
+
+    def path_index_sql(self, schema_editor, model, index):
+        field = model._meta.get_field(index.fields[0])
+        value = 'JSON_EXTRACT({}, {})'.format(
+            schema_editor.quote_name(field.column),
+            schema_editor.quote_value(self.compile_json_path(index.path)),
+        )
+        db_type = index.output_field.db_type(schema_editor.connection)
+        if index.value_type == 'text':
+            # JSON strings compare binary
+            db_type += ' CHARACTER SET utf8mb4 COLLATE utf8mb4_bin'
+        return Statement(
+            'ALTER TABLE %(table)s ADD COLUMN %(column)s %(type)s GENERATED ALWAYS AS (%(expression)s) VIRTUAL, '
+            'ADD INDEX %(name)s (%(column)s)',
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            column=schema_editor.quote_name(index.column),
+            type=db_type,
+            expression=self.path_index_expressions[index.value_type].format(value=value),
+            name=schema_editor.quote_name(index.name),
+        )
+
+    def remove_path_index_sql(self, schema_editor, model, index):
+        return Statement(
+            'ALTER TABLE %(table)s DROP COLUMN %(column)s',
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            column=schema_editor.quote_name(index.column),
+        )
+
+    def search_sql(self, compiler, lhs, params, key_transforms, words, index=None, col=None):
+        if index is None:
+            return super().search_sql(compiler, lhs, params, key_transforms, words)
+        column = '{}.{}'.format(
+            compiler.quote_name_unless_alias(col.alias), compiler.connection.ops.quote_name(index.column)
+        )
+        # Every word is required and matched as a phrase, so operators in it have no effect
+        query = ' '.join('+"{}"'.format(word.replace('"', '')) for word in words)
+        return 'MATCH ({}) AGAINST (%s IN BOOLEAN MODE)'.format(column), [query]
+
+    def search_index_sql(self, schema_editor, model, index):
+        # InnoDB only supports FULLTEXT indexes on stored generated columns
+        field = model._meta.get_field(index.fields[0])
+        value = 'JSON_EXTRACT({}, {})'.format(
+            schema_editor.quote_name(field.column),
+            schema_editor.quote_value(self.compile_json_path(index.path)),
+        )
+        table = Table(model._meta.db_table, schema_editor.quote_name)
+        column = schema_editor.quote_name(index.column)
+        return [
+            Statement(
+                'ALTER TABLE %(table)s ADD COLUMN %(column)s %(type)s GENERATED ALWAYS AS (%(expression)s) STORED',
+                table=table,
+                column=column,
+                type=index.output_field.db_type(schema_editor.connection),
+                expression=self.path_index_expressions['text'].format(value=value),
+            ),
+            Statement(
+                'CREATE FULLTEXT INDEX %(name)s ON %(table)s (%(column)s)',
+                name=schema_editor.quote_name(index.name),
+                table=table,
+                column=column,
+            ),
+        ]
+
+    def remove_search_index_sql(self, schema_editor, model, index):
+        return [self.remove_path_index_sql(schema_editor, model, index)]
+
+    def array_cast_type(self, output_field):
+        internal_type = output_field.get_internal_type()
+        if internal_type == 'CharField':
+            return 'CHAR({})'.format(output_field.max_length)
+        elif internal_type == 'DecimalField':
+            return 'DECIMAL({}, {})'.format(output_field.max_digits, output_field.decimal_places)
+        elif internal_type == 'FloatField':
+            return 'DOUBLE'
+        elif internal_type.startswith('Positive'):
+            return 'UNSIGNED'
+        return 'SIGNED'
+
+    def array_index_sql(self, schema_editor, model, index):
+        if not self.multi_valued:
+            return None
+        field = model._meta.get_field(index.fields[0])
+        return Statement(
+            'CREATE INDEX %(name)s ON %(table)s ((CAST(JSON_EXTRACT(%(column)s, %(path)s) AS %(type)s ARRAY)))',
+            name=schema_editor.quote_name(index.name),
+            table=Table(model._meta.db_table, schema_editor.quote_name),
+            column=schema_editor.quote_name(field.column),
+            path=schema_editor.quote_value(self.compile_json_path(index.path)),
+            type=self.array_cast_type(index.output_field),
+        )
+
+    def remove_array_index_sql(self, schema_editor, model, index):
+        if not self.multi_valued:
+            return None
+        return schema_editor._delete_index_sql(model, index.name)
+
+    def key_text_rhs(self, rhs, rhs_params):
+        return rhs, [json.dumps(p) for p in rhs_params]
+
+    def key_value_rhs(self, rhs, rhs_params):
+        return rhs, decode_scalar_params(rhs_params)
+
+    # Columns of JSON_TABLE() holding the values of key__in lookups passed as one
+    # array, how they are selected and the expression comparing the value at the
+    # key path with them. Strings are compared as bytes, as collations ignore
+    # case or trailing spaces.
+    key_in_columns = {
+        'text': (
+            'LONGTEXT CHARACTER SET utf8mb4',
+            'CAST(v.`value` AS BINARY)',
+            "CASE WHEN JSON_TYPE({value}) = 'STRING' THEN CAST(JSON_UNQUOTE({value}) AS BINARY) END",
+        ),
+        'integer': (
+            'BIGINT',
+            'v.`value`',
+            "CASE WHEN JSON_TYPE({value}) = 'INTEGER' THEN CAST({value} AS SIGNED) END",
+        ),
+    }
+
+    def key_in_sql(self, lhs, params, key_transforms, values):
+        # One JSON array parameter instead of a JSON conversion per value. IN does
+        # not compare JSON values as JSON, so values of one type are read into a
+        # column of the matching SQL type and compared with the value at the key
+        # path if it has that type.
+        if not self.json_table or len(values) < self.value_list_size:
+            return None
+        if all(isinstance(v.adapted, str) for v in values):
+            column, select, expression = self.key_in_columns['text']
+        elif all(type(v.adapted) is int and -2 ** 63 <= v.adapted < 2 ** 63 for v in values):
+            column, select, expression = self.key_in_columns['integer']
+        else:
+            return None
+        sql, params = self.key_transform_sql(lhs, params, key_transforms)
+        return (
+            "{} IN (SELECT {} FROM JSON_TABLE(CAST(%s AS JSON), '$[*]' COLUMNS (`value` {} PATH '$')) AS v)"
+        ).format(expression.format(value=sql), select, column), params + params + [encode_array(values)]
+
+    def case_insensitive(self, sql, params):
+        return 'LOWER(%s)' % sql, params
+
+
+class MariaDBBackend(MySQLBackend):
+    """
+    MariaDB stores JSON as LONGTEXT and has no JSON cast, so values are
+    compared in their plain string form.
+    """
+    name = 'mariadb'
+
+    def supports_multi_valued(self, connection):
+        return False
+
+    def supports_json_table(self, connection):
+        return connection.mysql_version >= (10, 6)
+
+    def stored_text(self, field, value):
+        # Documents are stored as text, the way the field wrote them
+        return TextBackend.stored_text(self, field, value)
+
+    def json_param_sql(self):
+        return "JSON_EXTRACT(%s, '$')"
+
+    def json_value_sql(self, compiler, connection, value):
+        return '%s', [value]
+
+    def json_argument_sql(self, sql, params):
+        return "JSON_EXTRACT({}, '$')".format(sql), params
+
+    def exact_rhs(self, compiler, connection, rhs, rhs_params):
+        return rhs, rhs_params
+
+    def key_in_sql(self, lhs, params, key_transforms, values):
+        return None
+
+
+def _resolve_backend(connection):
+    engine = connection.settings_dict['ENGINE']
+    if '.postgresql' in engine:
+        return PostgresBackend(connection)
+    elif '.mysql' in engine:
+        if connection_is_mariadb(connection):
+            return MariaDBBackend(connection)
+        return MySQLBackend(connection)
+    elif '.sqlite3' in engine:
+        if connection.Database.sqlite_version_info >= (3, 38):
+            return SQLiteBackend(connection)
+        return TextBackend(connection)
+    return TextBackend(connection)
+
+
+def get_backend(connection):
+    """
+    Returns the JSON backend for the given connection. The backend is
+    resolved on first use and cached on the connection object.
+    """
+    try:
+        return connection._jsonfallback_backend
+    except AttributeError:
+        backend = connection._jsonfallback_backend = _resolve_backend(connection)
+        return backend
@@ -0,0 +1,94 @@
+import threading
+import weakref
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils.functional import empty
+
+from .lazy import LazyJSON
+
+_local = threading.local()
+
+
+class DecodeBatch:
+    """
+    Documents loaded by the same query, which are decoded together on first access
+    to any of them. The batch only holds weak references, so documents that are
+    never read do not stay in memory because of it.
+    """
+
+    def __init__(self, codec, max_size):
+        self.codec = codec
+        self.max_size = max_size
+        self.proxies = []
+        self.closed = False
+
+    def add(self, proxy):
+        self.proxies.append(weakref.ref(proxy))
+        if len(self.proxies) >= self.max_size:
+            self.closed = True
+
+    def decode(self):
+        self.closed = True
+        proxies = [p for p in (ref() for ref in self.proxies) if p is not None and p._wrapped is empty]
+        self.proxies = []
+        if proxies:
+            for proxy, value in zip(proxies, self.codec.loads_many([p._raw for p in proxies])):
+                proxy._wrapped = value
+
+
+def get_open_batch(codec):
+    """
+    Returns the batch new documents of this thread are added to. Its size is limited
+    through the ``JSONFALLBACK_DECODE_BATCH_SIZE`` setting (2000 by default).
+    """
+    batch = getattr(_local, 'batch', None)
+    if batch is None or batch.closed or batch.codec is not codec:
+        batch = _local.batch = DecodeBatch(codec, getattr(settings, 'JSONFALLBACK_DECODE_BATCH_SIZE', 2000))
+    return batch
+
+
+def end_batch():
+    """
+    Makes documents loaded after this call start a new batch.
+    """
+    _local.batch = None
+
+
+class BatchedJSON(LazyJSON):
+    """
+    Proxy for a document that is decoded together with the other documents of its
+    batch, in a single call of the parser.
+    """
+
+    def __init__(self, raw, codec):
+        super().__init__(raw, codec)
+        batch = get_open_batch(codec)
+        batch.add(self)
+        self.__dict__['_batch'] = batch
+
+    def _decode(self):
+        if self._batch is not None:
+            self._batch.decode()
+            self.__dict__['_batch'] = None
+        if self._wrapped is empty:
+            return self._codec.loads(self._raw)
+        return self._wrapped
+
+
+class BatchDecodeQuerySet(QuerySet):
+    """
+    ``iterator()`` converts a whole chunk of rows before yielding the first of them,
+    so that documents of fields with ``batch_decode=True`` are decoded per chunk
+    instead of per row. Other querysets convert all rows up front anyway.
+    """
+
+    def iterator(self, chunk_size=2000):
+        rows = super().iterator(chunk_size)
+        while True:
+            end_batch()
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from chunk
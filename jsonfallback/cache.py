@@ -0,0 +1,177 @@
+import copy
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .lazy import LazyJSON
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(
+        'This JSON document is shared through the decode cache and is read-only. Modify it through '
+        'the model attribute (e.g. obj.data["key"] = value) or call obj.data.thaw() first.'
+    )
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary used for documents shared through the decode cache. Copies
+    of it are plain, mutable dictionaries.
+    """
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {k: copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    """
+    Read-only list used for documents shared through the decode cache. Copies of it
+    are plain, mutable lists.
+    """
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    elif isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+class DecodeCache:
+    """
+    Bounded LRU cache of decoded documents keyed by their raw JSON string. The size
+    is accounted as the total length of the cached raw strings.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, raw, codec):
+        with self.lock:
+            try:
+                value = self.entries[raw]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(raw)
+                self.hits += 1
+                return value
+
+        value = freeze(codec.loads(raw))
+        size = len(raw)
+        if size > self.max_size:
+            return value
+
+        with self.lock:
+            if raw not in self.entries:
+                self.entries[raw] = value
+                self.size += size
+                while self.size > self.max_size:
+                    key, _ = self.entries.popitem(last=False)
+                    self.size -= len(key)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'size': self.size,
+            'max_size': self.max_size,
+        }
+
+
+_decode_cache = None
+
+
+def get_decode_cache():
+    """
+    Returns the process-wide decode cache. Its size is configured through the
+    ``JSONFALLBACK_DECODE_CACHE_SIZE`` setting (in bytes, 32 MiB by default).
+    """
+    global _decode_cache
+    if _decode_cache is None:
+        _decode_cache = DecodeCache(getattr(settings, 'JSONFALLBACK_DECODE_CACHE_SIZE', 32 * 1024 * 1024))
+    return _decode_cache
+
+
+# Methods that modify a dict or list in place
+MUTATING_METHODS = frozenset((
+    'append', 'clear', 'extend', 'insert', 'pop', 'popitem', 'remove', 'reverse', 'setdefault', 'sort',
+    'update',
+))
+
+
+class SharedJSON(LazyJSON):
+    """
+    Proxy for a document from the decode cache. Reads are served from the shared,
+    read-only structure. The first modification through the proxy replaces it
+    with a private copy.
+    """
+
+    def __init__(self, raw, codec):
+        super().__init__(raw, codec)
+        self.__dict__['_thawed'] = False
+
+    def _decode(self):
+        return get_decode_cache().get(self._raw, self._codec)
+
+    def __getattr__(self, name):
+        if name in MUTATING_METHODS:
+            self.thaw()
+        return super().__getattr__(name)
+
+    def __setitem__(self, key, value):
+        self.thaw()
+        self._wrapped[key] = value
+
+    def __delitem__(self, key):
+        self.thaw()
+        del self._wrapped[key]
+
+    def thaw(self):
+        """
+        Replaces the shared document with a private, mutable copy.
+        """
+        if not self._thawed:
+            self._wrapped = self._codec.loads(self._raw)
+            self.__dict__['_thawed'] = True
+
+    @property
+    def is_unchanged(self):
+        return not self._thawed
@@ -0,0 +1,203 @@
+import json
+from importlib import import_module
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+
+@deconstructible
+class EncodingProfile:
+    """
+    How documents are written: the ``separators`` as for ``json.dumps()``, whether
+    keys are sorted and whether non-ASCII characters are escaped.
+
+    Sorted keys make the stored representation of a document independent of its
+    insertion order, which lookups comparing whole documents as text rely on.
+    """
+
+    def __init__(self, separators=(', ', ': '), sort_keys=True, ensure_ascii=True):
+        self.separators = tuple(separators)
+        self.sort_keys = sort_keys
+        self.ensure_ascii = ensure_ascii
+
+
+PROFILES = {
+    'default': EncodingProfile(),
+    'compact': EncodingProfile(separators=(',', ':'), ensure_ascii=False),
+    'unsorted': EncodingProfile(separators=(',', ':'), sort_keys=False, ensure_ascii=False),
+}
+
+
+def get_encoding_profile(profile):
+    """
+    Returns an encoding profile. ``profile`` can be a profile instance or one of the
+    names in ``PROFILES``.
+    """
+    if isinstance(profile, EncodingProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ImproperlyConfigured('Unknown JSON encoding profile {}'.format(profile))
+
+
+class JSONCodec:
+    """
+    Encodes and decodes documents using the standard library or any module with
+    a compatible ``dumps``/``loads`` interface, e.g. ``simplejson``.
+
+    Codecs write documents as described by an ``EncodingProfile``, which sorts
+    keys unless configured otherwise.
+    """
+    name = 'json'
+
+    def __init__(self, module=json):
+        self.module = module
+
+    def dumps(self, obj, encoder=None, profile=None):
+        profile = profile or PROFILES['default']
+        options = {'cls': encoder} if encoder else {}
+        options['sort_keys'] = profile.sort_keys
+        options['separators'] = profile.separators
+        options['ensure_ascii'] = profile.ensure_ascii
+        return self.module.dumps(obj, **options)
+
+    def loads(self, s):
+        return self.module.loads(s)
+
+    @property
+    def decode(self):
+        """
+        ``loads()``, or the ``loads`` of the module directly if it is not overridden,
+        which saves a call per document.
+        """
+        if type(self).loads is JSONCodec.loads:
+            return self.module.loads
+        return self.loads
+
+    def loads_many(self, strings):
+        """
+        Decodes a list of documents with a single call of the parser.
+        """
+        return self.loads('[{}]'.format(','.join(strings)))
+
+
+def _encoder_default(encoder):
+    """
+    Returns a ``default`` callable for third-party codecs that emulates the given
+    encoder class, or ``False`` if the encoder changes more than ``default()``
+    and therefore cannot be emulated.
+    """
+    if encoder is None:
+        return None
+    if encoder.encode is not json.JSONEncoder.encode or encoder.iterencode is not json.JSONEncoder.iterencode:
+        return False
+    return encoder().default
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Uses orjson for both directions. orjson always writes compact UTF-8 output,
+    so only ``sort_keys`` of the encoding profile applies. Values orjson refuses
+    to handle, such as integers beyond 64 bit, are encoded with the standard
+    library instead.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImproperlyConfigured('The orjson codec requires the orjson package to be installed.')
+        super().__init__()
+        self.orjson = orjson
+        self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, encoder=None, profile=None):
+        profile = profile or PROFILES['default']
+        default = _encoder_default(encoder)
+        if default is not False:
+            options = self.options | self.orjson.OPT_SORT_KEYS if profile.sort_keys else self.options
+            try:
+                return self.orjson.dumps(obj, default=default, option=options).decode()
+            except TypeError:
+                pass
+        return super().dumps(obj, encoder, profile)
+
+    def loads(self, s):
+        try:
+            return self.orjson.loads(s)
+        except ValueError:
+            return super().loads(s)
+
+
+class UjsonCodec(JSONCodec):
+    """
+    Uses ujson for both directions. ujson always writes compact output, so the
+    separators of the encoding profile do not apply.
+    """
+    name = 'ujson'
+
+    def __init__(self):
+        try:
+            import ujson
+        except ImportError:
+            raise ImproperlyConfigured('The ujson codec requires the ujson package to be installed.')
+        super().__init__()
+        self.ujson = ujson
+
+    def dumps(self, obj, encoder=None, profile=None):
+        profile = profile or PROFILES['default']
+        default = _encoder_default(encoder)
+        if default is not False:
+            try:
+                return self.ujson.dumps(
+                    obj, sort_keys=profile.sort_keys, ensure_ascii=profile.ensure_ascii, escape_forward_slashes=False,
+                    default=default
+                )
+            except (TypeError, OverflowError):
+                pass
+        return super().dumps(obj, encoder, profile)
+
+    def loads(self, s):
+        try:
+            return self.ujson.loads(s)
+        except ValueError:
+            return super().loads(s)
+
+
+CODECS = {
+    'json': JSONCodec,
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+}
+
+_codec_cache = {}
+
+
+def get_codec(codec):
+    """
+    Returns a codec instance. ``codec`` can be a codec instance, one of the names
+    in ``CODECS``, the dotted path of a module with a stdlib-compatible interface
+    or the dotted path of a codec class.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    try:
+        return _codec_cache[codec]
+    except KeyError:
+        pass
+
+    if codec in CODECS:
+        instance = CODECS[codec]()
+    else:
+        try:
+            instance = JSONCodec(import_module(codec))
+        except ImportError:
+            try:
+                instance = import_string(codec)()
+            except ImportError:
+                raise ImproperlyConfigured('Unknown JSON codec {}'.format(codec))
+    _codec_cache[codec] = instance
+    return instance
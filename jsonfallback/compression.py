@@ -0,0 +1,159 @@
+import struct
+import threading
+import zlib
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Compressed documents start with this header, followed by the algorithm and the
+# CRC32 of the dictionary (0 without one). JSON text never starts with a NUL byte,
+# so rows written before compression was enabled are told apart by its absence.
+MAGIC = b'\x00jf'
+HEADER = struct.Struct('>BI')
+HEADER_SIZE = len(MAGIC) + HEADER.size
+
+
+class Compressor:
+    """
+    Base class for compression algorithms for documents stored as text. The
+    optional ``dictionary`` is read from the file at ``dictionary_path``.
+    """
+    name = None
+    algorithm = None
+
+    def __init__(self, dictionary_path=None):
+        self.dictionary_path = dictionary_path
+        if dictionary_path:
+            try:
+                with open(dictionary_path, 'rb') as f:
+                    self.dictionary = f.read()
+            except OSError as e:
+                raise ImproperlyConfigured('Cannot read compression dictionary {}: {}'.format(dictionary_path, e))
+            self.dictionary_id = zlib.crc32(self.dictionary)
+        else:
+            self.dictionary = None
+            self.dictionary_id = 0
+        self.header = MAGIC + HEADER.pack(self.algorithm, self.dictionary_id)
+
+    def compress_bytes(self, data):
+        raise NotImplementedError
+
+    def decompress_bytes(self, data):
+        raise NotImplementedError
+
+    def compress(self, s):
+        return self.header + self.compress_bytes(s.encode())
+
+    def decompress(self, value):
+        """
+        Returns the JSON string stored in ``value``, which may also be an uncompressed
+        string or the bytes of one.
+        """
+        if isinstance(value, str):
+            return value
+        value = bytes(value)
+        if not value.startswith(MAGIC):
+            return value.decode()
+        algorithm, dictionary_id = HEADER.unpack_from(value, len(MAGIC))
+        if dictionary_id not in (0, self.dictionary_id):
+            raise ValueError('Document was compressed with a different dictionary')
+        if (algorithm, dictionary_id) == (self.algorithm, self.dictionary_id):
+            compressor = self
+        else:
+            try:
+                name = ALGORITHMS[algorithm]
+            except KeyError:
+                raise ValueError('Document was compressed with an unknown algorithm')
+            compressor = get_compressor(name, self.dictionary_path if dictionary_id else None)
+        return compressor.decompress_bytes(value[HEADER_SIZE:]).decode()
+
+
+class ZlibCompressor(Compressor):
+    """
+    Uses zlib from the standard library. A dictionary is used as preset dictionary,
+    so it should contain strings common in the documents, e.g. a typical one.
+    """
+    name = 'zlib'
+    algorithm = 1
+
+    def compress_bytes(self, data):
+        if self.dictionary:
+            compressor = zlib.compressobj(zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj()
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress_bytes(self, data):
+        if self.dictionary:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+class ZstdCompressor(Compressor):
+    """
+    Uses the zstandard package. Dictionaries can be trained with
+    ``train_dictionary()``.
+    """
+    name = 'zstd'
+    algorithm = 2
+
+    def __init__(self, dictionary_path=None):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImproperlyConfigured('The zstd compression requires the zstandard package to be installed.')
+        super().__init__(dictionary_path)
+        self.zstandard = zstandard
+        self.dict_data = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+        # (De)compressor objects must not be used by several threads at once
+        self.local = threading.local()
+
+    def compress_bytes(self, data):
+        if not hasattr(self.local, 'compressor'):
+            self.local.compressor = self.zstandard.ZstdCompressor(dict_data=self.dict_data)
+        return self.local.compressor.compress(data)
+
+    def decompress_bytes(self, data):
+        if not hasattr(self.local, 'decompressor'):
+            self.local.decompressor = self.zstandard.ZstdDecompressor(dict_data=self.dict_data)
+        return self.local.decompressor.decompress(data)
+
+
+def train_dictionary(samples, size=16 * 1024):
+    """
+    Trains a zstd dictionary of ``size`` bytes on a list of JSON strings and returns
+    it as bytes, to be written to the file passed as ``compression_dictionary``.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise ImproperlyConfigured('Training dictionaries requires the zstandard package to be installed.')
+    return zstandard.train_dictionary(size, [s.encode() for s in samples]).as_bytes()
+
+
+COMPRESSORS = {
+    'zlib': ZlibCompressor,
+    'zstd': ZstdCompressor,
+}
+
+ALGORITHMS = {cls.algorithm: name for name, cls in COMPRESSORS.items()}
+
+_compressor_cache = {}
+
+
+def get_compressor(name, dictionary_path=None):
+    """
+    Returns a compressor instance for one of the names in ``COMPRESSORS``.
+    """
+    try:
+        return _compressor_cache[name, dictionary_path]
+    except KeyError:
+        pass
+
+    try:
+        cls = COMPRESSORS[name]
+    except KeyError:
+        raise ImproperlyConfigured('Unknown compression {}'.format(name))
+    instance = _compressor_cache[name, dictionary_path] = cls(dictionary_path)
+    return instance
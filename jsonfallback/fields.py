@@ -1,74 +1,290 @@
-import collections
-import json
+import collections.abc
+import hashlib
 
 import django
+from django.conf import settings
 from django.contrib.postgres import lookups
 from django.contrib.postgres.fields import JSONField, jsonb
 from django.core import checks
-from django.db import NotSupportedError
-from django.db.models import Func, TextField, Value, lookups as builtin_lookups, Expression
+from django.core.exceptions import EmptyResultSet, ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections
+from django.db.models import (
+    BooleanField, CharField, DateField, DecimalField, FloatField, IntegerField,
+    TextField, Transform, lookups as builtin_lookups, signals,
+)
+from django.db.models.expressions import Col
+from django.db.models.sql.compiler import SQLUpdateCompiler
+from django.utils.functional import cached_property
 from django_mysql.checks import mysql_connections
 from django_mysql.utils import connection_is_mariadb
 
+from .backends import (  # NOQA
+    JSONValue, get_backend, mysql_compile_json_path,
+    postgres_compile_json_path,
+)
+from .batch import BatchedJSON
+from .cache import SharedJSON
+from .codecs import PROFILES, get_codec, get_encoding_profile
+from .compression import get_compressor
+from .indexes import JSONPathIndex, JSONSearchIndex
+from .lazy import LazyJSON, unwrap
+from .tracking import fingerprint, remember_loaded_documents
+
 
 class JsonAdapter(jsonb.JsonAdapter):
     """
-    Customized psycopg2.extras.Json to allow for a custom encoder.
+    Customized psycopg2.extras.Json to allow for a custom encoder, codec and
+    encoding profile.
     """
 
-    def __init__(self, adapted, dumps=None, encoder=None):
+    def __init__(self, adapted, dumps=None, encoder=None, codec=None, profile=None):
+        self.codec = codec or get_codec('json')
+        self.profile = profile
         super().__init__(adapted, dumps=dumps, encoder=encoder)
 
     def dumps(self, obj):
-        options = {'cls': self.encoder} if self.encoder else {}
-        options['sort_keys'] = True
-        return json.dumps(obj, **options)
+        if isinstance(obj, LazyJSON):
+            if obj.is_unchanged:
+                return obj.raw
+            obj = unwrap(obj)
+        return self.codec.dumps(obj, self.encoder, self.profile)
 
 
 class FallbackJSONField(jsonb.JSONField):
 
-    def __init__(self, **kwargs):
+    def __init__(self, codec=None, encoding=None, compression=None, compression_dictionary=None, binary=False,
+                 lazy=False, decode_cache=False, batch_decode=False, **kwargs):
+        self.codec = codec
+        self.encoding = encoding
+        self.compression = compression
+        self.compression_dictionary = compression_dictionary
+        self.binary = binary
+        self.lazy = lazy
+        self.decode_cache = decode_cache
+        self.batch_decode = batch_decode
+        # Decoders of values read from the database, by connection alias
+        self._decoders = {}
         super().__init__(**kwargs)
-        self.decoder = json.JSONDecoder()
+
+    @cached_property
+    def json_codec(self):
+        """
+        The codec used to encode and decode values of this field, configured through
+        the ``codec`` argument or the ``JSONFALLBACK_CODEC`` setting.
+        """
+        return get_codec(self.codec or getattr(settings, 'JSONFALLBACK_CODEC', 'json'))
+
+    @cached_property
+    def encoding_profile(self):
+        """
+        The ``EncodingProfile`` values of this field are written with, configured
+        through the ``encoding`` argument or the ``JSONFALLBACK_ENCODING`` setting.
+        """
+        return get_encoding_profile(self.encoding or getattr(settings, 'JSONFALLBACK_ENCODING', 'default'))
+
+    @cached_property
+    def compressor(self):
+        """
+        The compressor for documents stored as text, or ``None`` if they are stored
+        uncompressed.
+        """
+        if self.compression is None:
+            return None
+        return get_compressor(self.compression, self.compression_dictionary)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.codec is not None:
+            kwargs['codec'] = self.codec
+        if self.encoding is not None:
+            kwargs['encoding'] = self.encoding
+        if self.compression is not None:
+            kwargs['compression'] = self.compression
+        if self.compression_dictionary is not None:
+            kwargs['compression_dictionary'] = self.compression_dictionary
+        if self.binary:
+            kwargs['binary'] = True
+        if self.lazy:
+            kwargs['lazy'] = True
+        if self.decode_cache:
+            kwargs['decode_cache'] = True
+        if self.batch_decode:
+            kwargs['batch_decode'] = True
+        return name, path, args, kwargs
+
+    @cached_property
+    def proxy_class(self):
+        """
+        The proxy documents are loaded as, or ``None`` if they are decoded right away.
+        """
+        if self.decode_cache:
+            return SharedJSON
+        elif self.batch_decode:
+            return BatchedJSON
+        elif self.lazy:
+            return LazyJSON
+        return None
+
+    @cached_property
+    def path_indexes(self):
+        """
+        The ``JSONPathIndex`` instances of the model on this field, by key path.
+        """
+        return {
+            index.path: index for index in self.model._meta.indexes
+            if isinstance(index, JSONPathIndex) and index.fields == [self.name]
+        }
+
+    @cached_property
+    def search_indexes(self):
+        """
+        The ``JSONSearchIndex`` instances of the model on this field, by key path.
+        """
+        return {
+            index.path: index for index in self.model._meta.indexes
+            if isinstance(index, JSONSearchIndex) and index.fields == [self.name]
+        }
+
+    @cached_property
+    def key_index(self):
+        """
+        The ``JSONKeyIndex`` model recording the key paths of this field and its
+        foreign key to the model of the field, or ``None``.
+        """
+        from .keyindex import JSONKeyIndex
+
+        for rel in self.model._meta.related_objects:
+            if issubclass(rel.related_model, JSONKeyIndex) and rel.related_model.json_field == self.name:
+                return rel.related_model, rel.field
+        return None
+
+    @cached_property
+    def digest_field(self):
+        """
+        The ``JSONDigestField`` of the model on this field, or ``None``.
+        """
+        for field in self.model._meta.concrete_fields:
+            if isinstance(field, JSONDigestField) and field.source == self.name:
+                return field
+        return None
 
     def db_type(self, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            return super().db_type(connection)
-        elif '.mysql' in connection.settings_dict['ENGINE']:
-            return 'json'
-        else:
-            data = self.db_type_parameters(connection)
-            try:
-                return connection.data_types["TextField"] % data
-            except KeyError:
-                return None
+        return get_backend(connection).db_type(self, connection)
 
     def get_prep_value(self, value):
         if value is not None:
-            return JsonAdapter(value, encoder=self.encoder)
+            return JsonAdapter(value, encoder=self.encoder, codec=self.json_codec, profile=self.encoding_profile)
         return value
 
     def get_db_prep_value(self, value, connection, prepared=False):
         value = super().get_db_prep_value(value, connection, prepared)
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            return value
-        elif value is None:
-            return None
-        else:
-            return value.dumps(value.adapted)
+        return get_backend(connection).get_db_prep_value(value, self.compressor)
+
+    def get_decoder(self, connection):
+        """
+        The function decoding values read through ``connection``, or ``None`` if they
+        need no conversion. It is bound once per connection alias and used as the
+        converter of query results, so decoding a row costs a single call.
+        """
+        try:
+            return self._decoders[connection.alias]
+        except KeyError:
+            # Annotations use unbound fields, whose documents are never saved
+            field = self if hasattr(self, 'model') else None
+            decoder = self._decoders[connection.alias] = get_backend(connection).decoder(
+                self.json_codec, self.compressor, self.proxy_class, field, connection.alias
+            )
+            return decoder
+
+    def get_db_converters(self, connection):
+        decoder = self.get_decoder(connection)
+        return [] if decoder is None else [decoder]
 
     def from_db_value(self, value, expression, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            return value
-        elif '.postgresql' in connection.settings_dict['ENGINE']:
-            if isinstance(value, str):
-                return self.decoder.decode(value)
-            else:
-                return value
-        elif value is None:
-            return None
-        else:
-            return json.loads(value)
+        decoder = self.get_decoder(connection)
+        return value if decoder is None else decoder(value, expression, connection)
+
+    def select_format(self, compiler, sql, params):
+        sql, params = get_backend(compiler.connection).select_format(self, sql, params)
+        return super().select_format(compiler, sql, params)
+
+    def get_placeholder(self, value, compiler, connection):
+        if isinstance(compiler, SQLUpdateCompiler) and self.digest_field is not None:
+            self.check_digest_updated(compiler.query)
+        return get_backend(connection).get_placeholder(self)
+
+    def check_digest_updated(self, query):
+        """
+        Refuses updates of the document that leave its digest outdated. Saving
+        instances writes the digest along with the document, see
+        ``update_changed_documents()``, but the digest of values and expressions
+        given to ``QuerySet.update()`` cannot be computed in SQL.
+        """
+        digest_field = self.digest_field
+        if not any(field.attname == digest_field.attname for field, model, value in query.values):
+            raise NotSupportedError(
+                "Cannot update '{}' of {} without its digest '{}'.".format(
+                    self.name, self.model.__name__, digest_field.name
+                )
+            )
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            signals.post_init.connect(
+                remember_loaded_documents, sender=cls, weak=False, dispatch_uid='jsonfallback_fingerprints'
+            )
+            cls._do_update = update_changed_documents(cls._do_update)
+
+    def has_changed(self, model_instance, using=None):
+        """
+        Whether saving ``model_instance`` to the database ``using``, by default the
+        one it was loaded from, writes this field. Lazily loaded documents remember
+        the string they were loaded from, others the fingerprint of the text the
+        database returned, which is compared with the text the database would
+        return for the current value. Values assigned since, and documents saved to
+        another row or database than they were loaded from, are always written.
+        """
+        return self.compare_loaded(model_instance, using)[0]
+
+    def compare_loaded(self, model_instance, using=None):
+        """
+        Returns whether saving ``model_instance`` to ``using`` writes this field and
+        the text it was compared by, if it was.
+        """
+        if self.attname in model_instance.get_deferred_fields():
+            return False, None
+        value = getattr(model_instance, self.attname)
+        if isinstance(value, LazyJSON):
+            return value.has_changed(self.encoder), None
+        document, digest, pk, alias = getattr(model_instance, '_jsonfallback_fingerprints', {}).get(
+            self.attname, (None, None, None, None)
+        )
+        if digest is None or document is not value or value is None:
+            return True, None
+        using = using or model_instance._state.db or DEFAULT_DB_ALIAS
+        if alias != using or pk != model_instance.pk:
+            return True, None
+        try:
+            text = get_backend(connections[using]).stored_text(self, value)
+        except (TypeError, ValueError):
+            return True, None
+        return fingerprint(text) != digest, text
+
+    def forget_loaded(self, model_instance):
+        """
+        Drops the fingerprint of the document ``model_instance`` was loaded with,
+        once another one is written.
+        """
+        fingerprints = dict(getattr(model_instance, '_jsonfallback_fingerprints', {}))
+        if fingerprints.pop(self.attname, None) is not None:
+            model_instance._jsonfallback_fingerprints = fingerprints
+
+    def validate(self, value, model_instance):
+        super().validate(unwrap(value), model_instance)
+
+    def value_from_object(self, obj):
+        return unwrap(super().value_from_object(obj))
 
     def get_transform(self, name):
         transform = super(jsonb.JSONField, self).get_transform(name)
@@ -79,8 +295,50 @@ class FallbackJSONField(jsonb.JSONField):
     def check(self, **kwargs):
         errors = super(JSONField, self).check(**kwargs)
         errors.extend(self._check_mysql_version())
+        errors.extend(self._check_codec())
+        errors.extend(self._check_encoding())
+        errors.extend(self._check_compression())
         return errors
 
+    def _check_codec(self):
+        try:
+            self.json_codec
+        except ImproperlyConfigured as e:
+            return [
+                checks.Error(
+                    str(e),
+                    obj=self,
+                    id='jsonfallback.E002',
+                )
+            ]
+        return []
+
+    def _check_encoding(self):
+        try:
+            self.encoding_profile
+        except ImproperlyConfigured as e:
+            return [
+                checks.Error(
+                    str(e),
+                    obj=self,
+                    id='jsonfallback.E003',
+                )
+            ]
+        return []
+
+    def _check_compression(self):
+        try:
+            self.compressor
+        except ImproperlyConfigured as e:
+            return [
+                checks.Error(
+                    str(e),
+                    obj=self,
+                    id='jsonfallback.E004',
+                )
+            ]
+        return []
+
     def _check_mysql_version(self):
         errors = []
         any_conn_works = False
@@ -125,9 +383,125 @@ class FallbackJSONField(jsonb.JSONField):
         return super().get_lookup(lookup_name)
 
 
+class JSONDigestField(CharField):
+    """
+    SHA-256 digest of the document in the ``FallbackJSONField`` named ``source``,
+    which is computed on save. Exact and ``in`` lookups on the document compare
+    the digest instead.
+    """
+
+    def __init__(self, source, **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 64)
+        kwargs.setdefault('db_index', True)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(**kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        for key, default in (('max_length', 64), ('db_index', True), ('editable', False), ('default', '')):
+            if kwargs.get(key) == default:
+                del kwargs[key]
+        return name, path, args, kwargs
+
+    @cached_property
+    def source_field(self):
+        return self.model._meta.get_field(self.source)
+
+    def digest(self, value):
+        """
+        The digest of a document: documents that are equal as JSON have the same
+        digest, regardless of key order or the encoding profile of the field.
+        """
+        encoded = get_codec('json').dumps(unwrap(value), self.source_field.encoder, PROFILES['compact'])
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def pre_save(self, model_instance, add):
+        if add:
+            return self.update_digest(model_instance)
+        # Updates write the digest along with the document, see update_changed_documents()
+        return getattr(model_instance, self.attname)
+
+    def needs_update(self, model_instance, update_fields=None):
+        """
+        Whether saving ``model_instance`` writes the digest although the document is
+        not written: if it is missing or named in ``update_fields``, and the
+        document was loaded.
+        """
+        if self.source_field.attname in model_instance.get_deferred_fields():
+            return False
+        return not getattr(model_instance, self.attname) or bool(update_fields and self.name in update_fields)
+
+    def update_digest(self, model_instance):
+        value = self.digest(getattr(model_instance, self.source_field.attname))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def has_json_changed(instance, *field_names):
+    """
+    Whether saving ``instance`` writes any of the given ``FallbackJSONField`` fields,
+    or any of its ``FallbackJSONField`` fields if no names are given.
+    """
+    if field_names:
+        fields = [instance._meta.get_field(name) for name in field_names]
+    else:
+        fields = [f for f in instance._meta.concrete_fields if isinstance(f, FallbackJSONField)]
+    return any(field.has_changed(instance) for field in fields)
+
+
+def update_changed_documents(do_update):
+    """
+    Wraps ``Model._do_update()`` of models with a ``FallbackJSONField`` to write
+    only the ``changed_values()``.
+    """
+    if getattr(do_update, 'updates_changed_documents', False):
+        return do_update
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        values = changed_values(self, using, values, update_fields)
+        return do_update(self, base_qs, using, pk_val, values, update_fields, forced_update)
+
+    _do_update.updates_changed_documents = True
+    return _do_update
+
+
+def changed_values(instance, using, values, update_fields):
+    """
+    Leaves the documents that did not change since ``instance`` was loaded out of
+    the ``(field, model, value)`` triples of its UPDATE. They are neither sent to
+    the database again nor do triggers on their columns fire. Changed documents
+    are written as the text they were compared by.
+
+    Digests are written along with their document, even if ``update_fields``
+    leaves them out, and otherwise only if they are missing or named in
+    ``update_fields`` explicitly.
+    """
+    changed, digests, written = [], [], []
+    for field, model, value in values:
+        if isinstance(field, JSONDigestField):
+            digests.append(field)
+            continue
+        if isinstance(field, FallbackJSONField):
+            is_changed, text = field.compare_loaded(instance, using)
+            if not is_changed:
+                continue
+            if text is not None:
+                field.forget_loaded(instance)
+                value = LazyJSON(text, field.json_codec)
+            if field.digest_field is not None:
+                written.append(field.digest_field)
+        changed.append((field, model, value))
+    written += [f for f in digests if f not in written and f.needs_update(instance, update_fields)]
+    changed += [(field, None, field.update_digest(instance)) for field in written]
+    return changed
+
+
 class FallbackLookup:
     def as_sql(self, qn, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
+        if get_backend(connection).native:
             return super().as_sql(qn, connection)
         raise NotSupportedError(
             'Lookups on JSONFields are only supported on PostgreSQL and MySQL at the moment.'
@@ -138,36 +512,64 @@ class FallbackLookup:
 class DataContains(FallbackLookup, lookups.DataContains):
 
     def as_sql(self, qn, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
+        backend = get_backend(connection)
+        if backend.native:
             return super().as_sql(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            lhs, lhs_params = self.process_lhs(qn, connection)
-            rhs, rhs_params = self.process_rhs(qn, connection)
-            for i, p in enumerate(rhs_params):
-                rhs_params[i] = p.dumps(p.adapted)  # Convert JSONAdapter to str
-            params = lhs_params + rhs_params
-            return 'JSON_CONTAINS({}, {})'.format(lhs, rhs), params
-        raise NotSupportedError('Lookup not supported for %s' % connection.settings_dict['ENGINE'])
+        lhs, lhs_params = self.process_lhs(qn, connection)
+        rhs, rhs_params = self.process_rhs(qn, connection)
+        return backend.contains_sql(lhs, lhs_params, rhs, rhs_params)
 
 
 @FallbackJSONField.register_lookup
 class ContainedBy(FallbackLookup, lookups.ContainedBy):
 
     def as_sql(self, qn, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
+        backend = get_backend(connection)
+        if backend.native:
+            return super().as_sql(qn, connection)
+        lhs, lhs_params = self.process_lhs(qn, connection)
+        rhs, rhs_params = self.process_rhs(qn, connection)
+        return backend.contained_by_sql(lhs, lhs_params, rhs, rhs_params)
+
+
+class KeyExistenceLookup(FallbackLookup):
+    """
+    Base class for the ``has_key`` lookups. If the model has a ``JSONKeyIndex`` for
+    the field, keys are looked up there instead of in the documents.
+    """
+    any_key = False
+
+    def get_keys(self):
+        return self.rhs
+
+    def as_sql(self, qn, connection):
+        col, path = split_key_transform(self.lhs)
+        if col is not None and col.target.key_index is not None:
+            return self.key_index_sql(qn, connection, col, path)
+        backend = get_backend(connection)
+        if backend.native:
             return super().as_sql(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            lhs, lhs_params = self.process_lhs(qn, connection)
-            rhs, rhs_params = self.process_rhs(qn, connection)
-            for i, p in enumerate(rhs_params):
-                rhs_params[i] = p.dumps(p.adapted)  # Convert JSONAdapter to str
-            params = rhs_params + lhs_params
-            return 'JSON_CONTAINS({}, {})'.format(rhs, lhs), params
-        raise NotSupportedError('Lookup not supported for %s' % connection.settings_dict['ENGINE'])
+        lhs, lhs_params = self.process_lhs(qn, connection)
+        return backend.has_keys_sql(lhs, lhs_params, self.get_keys(), any_key=self.any_key)
+
+    def key_index_sql(self, compiler, connection, col, path):
+        from .keyindex import encode_path
+
+        index_model, fk = col.target.key_index
+        qn = connection.ops.quote_name
+        pk = '{}.{}'.format(compiler.quote_name_unless_alias(col.alias), qn(col.target.model._meta.pk.column))
+        subquery = '{} IN (SELECT {} FROM {} WHERE {} {{}})'.format(
+            pk, qn(fk.column), qn(index_model._meta.db_table), qn(index_model._meta.get_field('path').column)
+        )
+        paths = [encode_path(path + (str(key),)) for key in self.get_keys()]
+        if self.any_key:
+            return subquery.format('IN ({})'.format(', '.join('%s' for _ in paths))), paths
+        return '({})'.format(' AND '.join(subquery.format('= %s') for _ in paths)), paths
 
 
 @FallbackJSONField.register_lookup
-class HasKey(FallbackLookup, lookups.HasKey):
+class HasKey(KeyExistenceLookup, lookups.HasKey):
+    any_key = True
 
     def get_prep_lookup(self):
         if not isinstance(self.rhs, str):
@@ -176,16 +578,8 @@ class HasKey(FallbackLookup, lookups.HasKey):
             )
         return super().get_prep_lookup()
 
-    def as_sql(self, qn, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            return super().as_sql(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            lhs, lhs_params = self.process_lhs(qn, connection)
-            key_name = self.rhs
-            path = '$.{}'.format(json.dumps(key_name))
-            params = lhs_params + [path]
-            return "JSON_CONTAINS_PATH({}, 'one', %s)".format(lhs), params
-        raise NotSupportedError('Lookup not supported for %s' % connection.settings_dict['ENGINE'])
+    def get_keys(self):
+        return [self.rhs]
 
 
 class JSONSequencesMixin(object):
@@ -198,111 +592,109 @@ class JSONSequencesMixin(object):
 
 
 @FallbackJSONField.register_lookup
-class HasKeys(FallbackLookup, lookups.HasKeys):
-
-    def as_sql(self, qn, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            return super().as_sql(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            lhs, lhs_params = self.process_lhs(qn, connection)
-            paths = [
-                '$.{}'.format(json.dumps(key_name))
-                for key_name in self.rhs
-            ]
-            params = lhs_params + paths
-
-            sql = ['JSON_CONTAINS_PATH(', lhs, ", 'all', "]
-            sql.append(', '.join('%s' for _ in paths))
-            sql.append(')')
-            return ''.join(sql), params
-        raise NotSupportedError('Lookup not supported for %s' % connection.settings_dict['ENGINE'])
+class HasKeys(KeyExistenceLookup, lookups.HasKeys):
+    pass
 
 
 @FallbackJSONField.register_lookup
-class HasAnyKeys(FallbackLookup, lookups.HasAnyKeys):
-
-    def as_sql(self, qn, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            return super().as_sql(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            lhs, lhs_params = self.process_lhs(qn, connection)
-            paths = [
-                '$.{}'.format(json.dumps(key_name))
-                for key_name in self.rhs
-            ]
-            params = lhs_params + paths
-
-            sql = ['JSON_CONTAINS_PATH(', lhs, ", 'one', "]
-            sql.append(', '.join('%s' for _ in paths))
-            sql.append(')')
-            return ''.join(sql), params
-        raise NotSupportedError('Lookup not supported for %s' % connection.settings_dict['ENGINE'])
-
+class HasAnyKeys(KeyExistenceLookup, lookups.HasAnyKeys):
+    any_key = True
 
-class JSONValue(Func):
-    function = 'CAST'
-    template = '%(function)s(%(expressions)s AS JSON)'
-
-    def __init__(self, expression):
-        super(JSONValue, self).__init__(Value(expression))
 
+class DigestLookupMixin:
+    """
+    Compares the ``JSONDigestField`` of the document instead of the document, if
+    the model has one and the values are known.
+    """
 
-def postgres_compile_json_path(key_transforms):
-    return "{" + ','.join(key_transforms) + "}"
+    def as_sql(self, compiler, connection):
+        target = getattr(self.lhs, 'target', None)
+        if (isinstance(self.lhs, Col) and isinstance(target, FallbackJSONField) and target.digest_field is not None
+                and not hasattr(self.rhs, 'as_sql')):
+            digest_field = target.digest_field
+            values = self.rhs if isinstance(self, builtin_lookups.In) else [self.rhs]
+            values = [v.adapted if isinstance(v, jsonb.JsonAdapter) else v for v in values]
+            values = [v for v in values if v is not None]
+            if not values:
+                raise EmptyResultSet
+            lhs = '{}.{}'.format(compiler.quote_name_unless_alias(self.lhs.alias), connection.ops.quote_name(digest_field.column))
+            rhs = ', '.join('%s' for _ in values)
+            if isinstance(self, builtin_lookups.In):
+                rhs = '({})'.format(rhs)
+            return '{} {}'.format(lhs, self.get_rhs_op(connection, rhs)), [digest_field.digest(v) for v in values]
+        return super().as_sql(compiler, connection)
 
 
-def mysql_compile_json_path(key_transforms):
-    path = ['$']
-    for key_transform in key_transforms:
-        try:
-            num = int(key_transform)
-            path.append('[{}]'.format(num))
-        except ValueError:  # non-integer
-            path.append('.')
-            path.append(key_transform)
-    return ''.join(path)
+@FallbackJSONField.register_lookup
+class JSONIn(DigestLookupMixin, builtin_lookups.In):
+    pass
 
 
 if django.VERSION >= (2, 1):
     @FallbackJSONField.register_lookup
-    class JSONExact(lookups.JSONExact):
+    class JSONExact(DigestLookupMixin, lookups.JSONExact):
+
+        def process_lhs(self, compiler, connection, lhs=None):
+            lhs, lhs_params = super().process_lhs(compiler, connection, lhs)
+            return get_backend(connection).exact_lhs(lhs, lhs_params)
 
         def process_rhs(self, compiler, connection):
             rhs, rhs_params = super().process_rhs(compiler, connection)
-            if '.mysql' in connection.settings_dict['ENGINE']:
-                if not connection_is_mariadb(connection):
-                    func_params = []
-                    new_params = []
-                    for i, p in enumerate(rhs_params):
-                        if not hasattr(p, '_prepare') and p is not None:
-                            func, this_func_param = JSONValue(p).as_sql(compiler, connection)
-                            func_params.append(func)
-                            new_params += this_func_param
-                        else:
-                            func_params.append(p)
-                    rhs, rhs_params = rhs % tuple(func_params), new_params
-
-            return rhs, rhs_params
+            return get_backend(connection).exact_rhs(compiler, connection, rhs, rhs_params)
 
 
 class FallbackKeyTransform(jsonb.KeyTransform):
-    def as_sql(self, compiler, connection):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            return super().as_sql(compiler, connection)
-        elif '.mysql' in connection.settings_dict['ENGINE']:
-            key_transforms = [self.key_name]
-            previous = self.lhs
-            while isinstance(previous, FallbackKeyTransform):
-                key_transforms.insert(0, previous.key_name)
-                previous = previous.lhs
-
-            lhs, params = compiler.compile(previous)
-            json_path = mysql_compile_json_path(key_transforms)
-            return 'JSON_EXTRACT({}, %s)'.format(lhs), params + [json_path]
+    as_text = False
+
+    @cached_property
+    def key_path(self):
+        """
+        The keys of this transform and all key transforms it is applied to, outermost
+        first.
+        """
+        key_transforms = [self.key_name]
+        previous = self.lhs
+        while isinstance(previous, FallbackKeyTransform):
+            key_transforms.append(previous.key_name)
+            previous = previous.lhs
+        key_transforms.reverse()
+        return tuple(key_transforms)
 
-        raise NotSupportedError(
-            'Transforms on JSONFields are only supported on PostgreSQL and MySQL at the moment.'
-        )
+    def as_sql(self, compiler, connection):
+        previous = self.lhs
+        while isinstance(previous, FallbackKeyTransform):
+            previous = previous.lhs
+
+        lhs, params = compiler.compile(previous)
+        return get_backend(connection).key_transform_sql(lhs, list(params), self.key_path, as_text=self.as_text)
+
+    def get_path_index(self):
+        """
+        Returns the column this transform is applied to and the ``JSONPathIndex`` on
+        its key path, or ``(None, None)``.
+        """
+        col, path = split_key_transform(self)
+        if col is not None:
+            index = col.target.path_indexes.get(path)
+            if index is not None:
+                return col, index
+        return None, None
+
+
+def split_key_transform(expression):
+    """
+    Returns the ``FallbackJSONField`` column a chain of key transforms is applied to
+    and the key path of the chain, or ``(None, ())``. ``expression`` may also be
+    the column itself.
+    """
+    path = ()
+    if isinstance(expression, FallbackKeyTransform):
+        path = expression.key_path
+        while isinstance(expression, FallbackKeyTransform):
+            expression = expression.lhs
+    if isinstance(expression, Col) and isinstance(expression.target, FallbackJSONField):
+        return expression, path
+    return None, ()
 
 
 class FallbackKeyTransformFactory:
@@ -318,6 +710,7 @@ class KeyTextTransform(FallbackKeyTransform):
     operator = '->>'
     nested_operator = '#>>'
     output_field = TextField()
+    as_text = True
 
 
 class KeyTransformTextLookupMixin:
@@ -337,66 +730,67 @@ class KeyTransformTextLookupMixin:
 
 class StringKeyTransformTextLookupMixin(KeyTransformTextLookupMixin):
     def process_rhs(self, qn, connection):
-        rhs = super().process_rhs(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            params = []
-            for p in rhs[1]:
-                params.append(json.dumps(p))
-            return rhs[0], params
-        return rhs
+        rhs, rhs_params = super().process_rhs(qn, connection)
+        return get_backend(connection).key_text_rhs(rhs, rhs_params)
 
 
 class NonStringKeyTransformTextLookupMixin:
+    def process_lhs(self, compiler, connection, lhs=None):
+        if lhs is None and get_backend(connection).compare_key_text:
+            lhs = KeyTextTransform(self.lhs.key_name, *self.lhs.source_expressions, **self.lhs.extra)
+        return super().process_lhs(compiler, connection, lhs)
+
     def process_rhs(self, qn, connection):
-        rhs = super().process_rhs(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            params = []
-            for p in rhs[1]:
-                val = json.loads(p)
-                if isinstance(val, (list, dict)):
-                    val = json.dumps(val)
-                params.append(val)
-            return rhs[0], params
-        return rhs
+        rhs, rhs_params = super().process_rhs(qn, connection)
+        return get_backend(connection).key_value_rhs(rhs, rhs_params)
+
+
+class PathIndexLookupMixin:
+    """
+    Compares the generated column of a ``JSONPathIndex`` instead of the extracted
+    key, if the database has one and all values have the type of the column.
+    """
+
+    def path_index_column_sql(self, compiler, connection):
+        """
+        The lookup against the generated column, or ``None`` if it cannot be used.
+        """
+        if get_backend(connection).path_index_columns:
+            col, index = self.lhs.get_path_index()
+            if index is not None:
+                values = self.rhs if isinstance(self, builtin_lookups.In) else [self.rhs]
+                values = [v.adapted if isinstance(v, jsonb.JsonAdapter) else v for v in values]
+                if values and all(index.accepts(v) for v in values):
+                    lhs = '{}.{}'.format(compiler.quote_name_unless_alias(col.alias), connection.ops.quote_name(index.column))
+                    rhs = ', '.join('%s' for _ in values)
+                    if isinstance(self, builtin_lookups.In):
+                        rhs = '({})'.format(rhs)
+                    params = [index.output_field.get_db_prep_value(v, connection) for v in values]
+                    return '{} {}'.format(lhs, self.get_rhs_op(connection, rhs)), params
+        return None
+
+    def as_sql(self, compiler, connection):
+        sql = self.path_index_column_sql(compiler, connection)
+        if sql is not None:
+            return sql
+        return super().as_sql(compiler, connection)
 
 
 class MySQLCaseInsensitiveMixin:
     def process_lhs(self, compiler, connection, lhs=None):
-        lhs = super().process_lhs(compiler, connection, lhs=None)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            lhs = 'LOWER(%s)' % lhs[0], lhs[1]
-        return lhs
+        lhs, lhs_params = super().process_lhs(compiler, connection, lhs=None)
+        return get_backend(connection).case_insensitive(lhs, lhs_params)
 
     def process_rhs(self, qn, connection):
-        rhs = super().process_rhs(qn, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            rhs = 'LOWER(%s)' % rhs[0], rhs[1]
-        return rhs
+        rhs, rhs_params = super().process_rhs(qn, connection)
+        return get_backend(connection).case_insensitive(rhs, rhs_params)
 
 
 @FallbackKeyTransform.register_lookup
-class KeyTransformExact(builtin_lookups.Exact):
+class KeyTransformExact(PathIndexLookupMixin, builtin_lookups.Exact):
     def process_rhs(self, compiler, connection):
         rhs, rhs_params = super().process_rhs(compiler, connection)
-        if '.mysql' in connection.settings_dict['ENGINE']:
-            func_params = []
-            new_params = []
-
-            for i, p in enumerate(rhs_params):
-                val = json.loads(p)
-                if isinstance(val, (list, dict)):
-                    if not connection_is_mariadb(connection):
-                        func, this_func_param = JSONValue(json.dumps(val)).as_sql(compiler, connection)
-                        func_params.append(func)
-                        new_params += this_func_param
-                    else:
-                        func_params.append('%s')
-                        new_params.append(json.dumps(val))
-                else:
-                    func_params.append('%s')
-                    new_params.append(val)
-                rhs, rhs_params = rhs % tuple(func_params), new_params
-        return rhs, rhs_params
+        return get_backend(connection).key_exact_rhs(compiler, connection, rhs, rhs_params)
 
 
 @FallbackKeyTransform.register_lookup
@@ -445,20 +839,220 @@ class KeyTransformIRegex(StringKeyTransformTextLookupMixin, builtin_lookups.IReg
 
 
 @FallbackKeyTransform.register_lookup
-class KeyTransformLte(NonStringKeyTransformTextLookupMixin, builtin_lookups.LessThanOrEqual):
+class KeyTransformIn(PathIndexLookupMixin, NonStringKeyTransformTextLookupMixin, builtin_lookups.In):
+    """
+    Passes the values as a single array if the backend supports it, so that long
+    lists neither produce a parameter per value nor a JSON conversion per value.
+    """
+
+    def as_sql(self, compiler, connection):
+        sql = self.path_index_column_sql(compiler, connection)
+        if sql is None and self.rhs_is_direct_value():
+            sql = self.value_list_sql(compiler, connection)
+        if sql is not None:
+            return sql
+        return super().as_sql(compiler, connection)
+
+    def value_list_sql(self, compiler, connection):
+        """
+        The lookup against all values in one parameter, or ``None`` if the backend
+        compares these values one by one.
+        """
+        values = list(self.rhs)
+        if not values or not all(isinstance(v, jsonb.JsonAdapter) and v.adapted is not None for v in values):
+            return None
+        previous = self.lhs
+        while isinstance(previous, FallbackKeyTransform):
+            previous = previous.lhs
+        lhs, params = compiler.compile(previous)
+        return get_backend(connection).key_in_sql(lhs, list(params), self.lhs.key_path, values)
+
+
+class ArrayMembershipLookup(builtin_lookups.Lookup):
+    """
+    Base class for lookups on the elements of an array at a key path. Subclasses
+    name the backend method compiling them in ``backend_method`` and set ``many``
+    if the right-hand side is a list of values rather than a single value.
+    """
+    prepare_rhs = False
+    backend_method = None
+    many = False
+
+    def as_sql(self, compiler, connection):
+        values = list(self.rhs) if self.many else [self.rhs]
+        if not values:
+            raise EmptyResultSet
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs_param = self.lhs.output_field.get_prep_value(values)
+        return getattr(get_backend(connection), self.backend_method)(lhs, list(lhs_params), rhs_param)
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformMemberOf(ArrayMembershipLookup):
+    lookup_name = 'member_of'
+    backend_method = 'member_of_sql'
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformOverlaps(ArrayMembershipLookup):
+    lookup_name = 'overlaps'
+    backend_method = 'overlaps_sql'
+    many = True
+
+    def get_prep_lookup(self):
+        if isinstance(self.rhs, (str, dict)) or not isinstance(self.rhs, collections.abc.Iterable):
+            raise ValueError(
+                "JSONField's 'overlaps' lookup only works with lists of values",
+            )
+        return list(self.rhs)
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformLte(PathIndexLookupMixin, NonStringKeyTransformTextLookupMixin, builtin_lookups.LessThanOrEqual):
     pass
 
 
 @FallbackKeyTransform.register_lookup
-class KeyTransformLt(NonStringKeyTransformTextLookupMixin, builtin_lookups.LessThan):
+class KeyTransformLt(PathIndexLookupMixin, NonStringKeyTransformTextLookupMixin, builtin_lookups.LessThan):
     pass
 
 
 @FallbackKeyTransform.register_lookup
-class KeyTransformGte(NonStringKeyTransformTextLookupMixin, builtin_lookups.GreaterThanOrEqual):
+class KeyTransformGte(PathIndexLookupMixin, NonStringKeyTransformTextLookupMixin, builtin_lookups.GreaterThanOrEqual):
     pass
 
 
 @FallbackKeyTransform.register_lookup
-class KeyTransformGt(NonStringKeyTransformTextLookupMixin, builtin_lookups.GreaterThan):
+class KeyTransformGt(PathIndexLookupMixin, NonStringKeyTransformTextLookupMixin, builtin_lookups.GreaterThan):
     pass
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformSearch(builtin_lookups.Lookup):
+    """
+    Full-text search for all words of the value in the string at a key path, e.g.
+    ``data__description__search='ring elves'``. Uses the ``JSONSearchIndex`` on the
+    path if there is one.
+    """
+    lookup_name = 'search'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        words = str(self.rhs).split()
+        if not words:
+            raise EmptyResultSet
+        col, path = split_key_transform(self.lhs)
+        index = col.target.search_indexes.get(path) if col is not None else None
+        previous = self.lhs
+        while isinstance(previous, FallbackKeyTransform):
+            previous = previous.lhs
+        lhs, params = compiler.compile(previous)
+        return get_backend(connection).search_sql(
+            compiler, lhs, list(params), self.lhs.key_path, words, index=index, col=col
+        )
+
+
+class KeyTransformCast(Transform):
+    """
+    Casts the value at a key path to ``output_field`` in the database, e.g.
+    ``data__publication__year__as_int``. On PostgreSQL, this is the expression of a
+    ``JSONPathIndex`` with the same output field. On MySQL and MariaDB, the
+    generated column of a ``JSONPathIndex`` with an output field of the same type
+    is used instead. Transforms are named ``as_<cast>``, so that keys named like a
+    cast, e.g. ``date``, can still be queried.
+    """
+    # The name of the cast in JSONCast and the backends
+    cast = None
+    # Internal types of JSONPathIndex output fields holding the same values
+    index_types = ()
+
+    def as_sql(self, compiler, connection):
+        backend = get_backend(connection)
+        if backend.path_index_columns:
+            col, index = self.lhs.get_path_index()
+            if index is not None and index.output_field.get_internal_type() in self.index_types:
+                return '{}.{}'.format(
+                    compiler.quote_name_unless_alias(col.alias), connection.ops.quote_name(index.column)
+                ), []
+        previous = self.lhs
+        while isinstance(previous, FallbackKeyTransform):
+            previous = previous.lhs
+        lhs, params = compiler.compile(previous)
+        return backend.key_cast_sql(lhs, list(params), self.lhs.key_path, self.cast)
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformInt(KeyTransformCast):
+    lookup_name = 'as_int'
+    cast = 'int'
+    index_types = ('IntegerField', 'BigIntegerField', 'SmallIntegerField')
+    output_field = IntegerField()
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformFloat(KeyTransformCast):
+    lookup_name = 'as_float'
+    cast = 'float'
+    index_types = ('FloatField',)
+    output_field = FloatField()
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformDecimal(KeyTransformCast):
+    lookup_name = 'as_decimal'
+    cast = 'decimal'
+    index_types = ('DecimalField',)
+    output_field = DecimalField()
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformBool(KeyTransformCast):
+    lookup_name = 'as_bool'
+    cast = 'bool'
+    index_types = ('BooleanField',)
+    output_field = BooleanField()
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformDate(KeyTransformCast):
+    lookup_name = 'as_date'
+    cast = 'date'
+    output_field = DateField()
+
+
+@FallbackKeyTransform.register_lookup
+class KeyTransformText(KeyTransformCast):
+    lookup_name = 'as_text'
+    cast = 'text'
+    index_types = ('CharField',)
+    output_field = TextField()
+
+
+KEY_CASTS = {
+    transform.cast: transform for transform in (
+        KeyTransformInt, KeyTransformFloat, KeyTransformDecimal, KeyTransformBool, KeyTransformDate,
+        KeyTransformText,
+    )
+}
+
+
+class JSONLength(Transform):
+    """
+    The number of elements of the array in the document or at a key path, e.g.
+    ``data__items__array_len__gt=10``. ``None`` if the value is not an array.
+    """
+    lookup_name = 'array_len'
+    output_field = IntegerField()
+
+    def as_sql(self, compiler, connection):
+        previous, path = self.lhs, ()
+        if isinstance(previous, FallbackKeyTransform):
+            path = previous.key_path
+            while isinstance(previous, FallbackKeyTransform):
+                previous = previous.lhs
+        lhs, params = compiler.compile(previous)
+        return get_backend(connection).array_length_sql(lhs, list(params), path)
+
+
+FallbackJSONField.register_lookup(JSONLength)
+FallbackKeyTransform.register_lookup(JSONLength)
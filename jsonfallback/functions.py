@@ -1,14 +1,31 @@
 import copy
-from django.db import NotSupportedError
-from django.db.models import Expression
 
-from .fields import mysql_compile_json_path, postgres_compile_json_path, FallbackJSONField
+from django.db.models import Aggregate, Expression, IntegerField
+from django.db.models.expressions import Col, ExpressionList
+from django.db.models.sql.constants import INNER
 
+from .backends import get_backend
+from .fields import KEY_CASTS, FallbackJSONField, FallbackKeyTransform
 
-class JSONExtract(Expression):
-    def __init__(self, expression, *path, output_field=FallbackJSONField(), **extra):
+
+def parse_path(path):
+    """
+    Turns a key, a dotted path or a sequence of keys into a tuple of keys.
+    """
+    if isinstance(path, str):
+        path = path.split('.')
+    return tuple(str(key) for key in path)
+
+
+class JSONFunction(Expression):
+    """
+    Base class for functions on a single JSON document. Subclasses compiled by
+    ``as_sql()`` define ``json_sql(backend, lhs, params)``, which returns the SQL
+    of the function applied to the compiled document.
+    """
+
+    def __init__(self, expression, output_field=None, **extra):
         super().__init__(output_field=output_field)
-        self.path = path
         self.source_expression = self._parse_expressions(expression)[0]
         self.extra = extra
 
@@ -18,30 +35,332 @@ class JSONExtract(Expression):
         c.source_expression = c.source_expression.resolve_expression(query, allow_joins, reuse, summarize, for_save)
         return c
 
+    def _resolve_output_field(self):
+        return self.source_expression.output_field
+
+    def get_source_expressions(self):
+        return [self.source_expression]
+
+    def set_source_expressions(self, exprs):
+        self.source_expression, = exprs
+
     def as_sql(self, compiler, connection, function=None, template=None, arg_joiner=None, **extra_context):
-        if '.postgresql' in connection.settings_dict['ENGINE']:
-            params = []
-            arg_sql, arg_params = compiler.compile(self.source_expression)
-            params.extend(arg_params)
-            json_path = postgres_compile_json_path(self.path)
-            params.append(json_path)
-            template = '{} #> %s'.format(arg_sql)
-            return template, params
-        elif '.mysql' in connection.settings_dict['ENGINE']:
-            params = []
-            arg_sql, arg_params = compiler.compile(self.source_expression)
-            params.extend(arg_params)
-            json_path = mysql_compile_json_path(self.path)
-            params.append(json_path)
-            template = 'JSON_EXTRACT({}, %s)'.format(arg_sql)
-            return template, params
-        else:
-            raise NotSupportedError(
-                'Functions on JSONFields are only supported on PostgreSQL and MySQL at the moment.'
-            )
+        arg_sql, arg_params = compiler.compile(self.source_expression)
+        return self.json_sql(get_backend(connection), arg_sql, list(arg_params))
+
+    def encode(self, value):
+        """
+        Encodes ``value`` with the codec and encoder of the document's field.
+        """
+        if value is None:
+            return 'null'
+        adapter = self.output_field.get_prep_value(value)
+        return adapter.dumps(adapter.adapted)
 
     def copy(self):
         c = super().copy()
         c.source_expression = copy.copy(self.source_expression)
         c.extra = self.extra.copy()
         return c
+
+
+class JSONExtract(JSONFunction):
+    def __init__(self, expression, *path, output_field=FallbackJSONField(), **extra):
+        super().__init__(expression, output_field=output_field, **extra)
+        self.path = path
+
+    def json_sql(self, backend, lhs, params):
+        return backend.extract_sql(lhs, params, tuple(self.path))
+
+
+class JSONArrayLength(JSONFunction):
+    """
+    The number of elements of the array at ``path``, or ``None`` if there is no
+    array at the path. The same as the ``array_len`` transform, for annotations and
+    ordering.
+    """
+
+    def __init__(self, expression, *path, output_field=IntegerField(), **extra):
+        super().__init__(expression, output_field=output_field, **extra)
+        self.path = parse_path(path)
+
+    def json_sql(self, backend, lhs, params):
+        return backend.array_length_sql(lhs, params, self.path)
+
+
+class JSONCast(JSONFunction):
+    """
+    The value at ``path`` cast to ``'int'``, ``'float'``, ``'decimal'``, ``'bool'``,
+    ``'date'`` or ``'text'``, for annotations, aggregates and ordering. This is the
+    same as the cast transforms, e.g. ``JSONCast('data', 'publication.year', 'int')``
+    and ``data__publication__year__as_int``.
+    """
+
+    def __init__(self, expression, path, cast, **extra):
+        transform = KEY_CASTS.get(cast)
+        if transform is None:
+            raise ValueError('Unknown cast: {}'.format(cast))
+        super().__init__(expression, **extra)
+        self.path = parse_path(path)
+        self.transform = transform
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        c = super().resolve_expression(query, allow_joins, reuse, summarize, for_save)
+        expression = c.source_expression
+        for key in c.path:
+            expression = FallbackKeyTransform(key, expression)
+        return c.transform(expression)
+
+
+class JSONProjection(JSONFunction):
+    """
+    A document with only the values at ``paths``, nested like in the original
+    document. Keys missing in the original document are ``None``.
+    """
+
+    def __init__(self, expression, paths, output_field=FallbackJSONField(), **extra):
+        if not paths:
+            raise ValueError('JSONProjection requires at least one path')
+        super().__init__(expression, output_field=output_field, **extra)
+        self.paths = [parse_path(path) for path in paths]
+
+    @property
+    def tree(self):
+        """
+        The paths as nested dicts. Leaves are ``None``, paths below another path are
+        left out.
+        """
+        tree = {}
+        for path in sorted(set(self.paths), key=len):
+            node = tree
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+                if node is None:
+                    break
+            else:
+                node[path[-1]] = None
+        return tree
+
+    def json_sql(self, backend, lhs, params):
+        return self.object_sql(backend, lhs, params, self.tree, ())
+
+    def object_sql(self, backend, lhs, params, tree, prefix):
+        items = []
+        for key, subtree in tree.items():
+            path = prefix + (key,)
+            if subtree is None:
+                sql, value_params = backend.extract_sql(lhs, list(params), path)
+                sql, value_params = backend.json_argument_sql(sql, value_params)
+            else:
+                sql, value_params = self.object_sql(backend, lhs, params, subtree, path)
+            items.append((key, sql, value_params))
+        return backend.build_object_sql(items)
+
+
+class JSONSet(JSONFunction):
+    """
+    The document with ``value`` stored at ``path``, for use in ``QuerySet.update()``.
+    Missing keys at the end of the path are created.
+    """
+
+    def __init__(self, expression, path, value, **extra):
+        super().__init__(expression, **extra)
+        self.path = parse_path(path)
+        self.value = value
+
+    def json_sql(self, backend, lhs, params):
+        return backend.set_key_sql(lhs, params, self.path, self.encode(self.value))
+
+
+class JSONRemove(JSONFunction):
+    """
+    The document without the value at ``path``.
+    """
+
+    def __init__(self, expression, path, **extra):
+        super().__init__(expression, **extra)
+        self.path = parse_path(path)
+
+    def json_sql(self, backend, lhs, params):
+        return backend.remove_key_sql(lhs, params, self.path)
+
+
+class JSONMerge(JSONFunction):
+    """
+    The document merged with the object ``value``. On MySQL, MariaDB and SQLite,
+    this is a JSON merge patch (RFC 7396): objects are merged recursively and
+    ``None`` values remove keys. On PostgreSQL, top-level keys are replaced.
+    """
+
+    def __init__(self, expression, value, **extra):
+        if not isinstance(value, dict):
+            raise ValueError('JSONMerge requires a dict value')
+        super().__init__(expression, **extra)
+        self.value = value
+
+    def json_sql(self, backend, lhs, params):
+        return backend.merge_sql(lhs, params, self.encode(self.value))
+
+
+class ArrayElementsJoin:
+    """
+    Joins the elements of the array at ``path`` of a document, one row per element.
+    Only the part of the ``Join`` interface used for joins Django does not set up
+    itself is implemented.
+    """
+    join_type = INNER
+    nullable = False
+    join_field = None
+    filtered_relation = None
+    table_name = 'jsonfallback_elements'
+
+    def __init__(self, source_expression, path, table_alias, parent_alias):
+        self.source_expression = source_expression
+        self.path = path
+        self.table_alias = table_alias
+        self.parent_alias = parent_alias
+
+    def as_sql(self, compiler, connection):
+        lhs, params = compiler.compile(self.source_expression)
+        alias = connection.ops.quote_name(self.table_alias)
+        return get_backend(connection).array_elements_join_sql(lhs, list(params), self.path, alias)
+
+    def relabeled_clone(self, change_map):
+        return type(self)(
+            self.source_expression.relabeled_clone(change_map), self.path,
+            change_map.get(self.table_alias, self.table_alias), change_map.get(self.parent_alias, self.parent_alias),
+        )
+
+    def equals(self, other, with_filtered_relation=False):
+        # Combining querysets with | reuses the joins equal to the ones of the left
+        # hand side instead of adding them again, which would repeat every row.
+        return (
+            isinstance(other, ArrayElementsJoin) and
+            self.parent_alias == other.parent_alias and
+            self.path == other.path and
+            self.same_source(other.source_expression)
+        )
+
+    def same_source(self, expression):
+        # Relabeled columns pass their output field on, which makes them unequal
+        source = self.source_expression
+        if isinstance(source, Col) and isinstance(expression, Col):
+            return (source.alias, source.target) == (expression.alias, expression.target)
+        return source == expression
+
+    def __eq__(self, other):
+        return self.equals(other)
+
+    def __hash__(self):
+        return hash((self.parent_alias, self.path))
+
+    def promote(self):
+        return self
+
+    def demote(self):
+        return self
+
+
+class JSONArrayElements(JSONFunction):
+    """
+    The elements of the array at ``path``, one row per element. Rows whose
+    document has no array at the path are left out. Use it with
+    ``QuerySet.annotate()`` and group by values extracted from the elements::
+
+        Order.objects.annotate(item=JSONArrayElements('data', 'items')).values(
+            sku=JSONExtract('item', 'sku')
+        ).annotate(count=Count('*'))
+    """
+
+    def __init__(self, expression, *path, output_field=FallbackJSONField(), **extra):
+        super().__init__(expression, output_field=output_field, **extra)
+        self.path = parse_path(path)
+        self.alias = None
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        c = super().resolve_expression(query, allow_joins, reuse, summarize, for_save)
+        parent_alias = query.get_initial_alias()
+        c.alias, _ = query.table_alias(ArrayElementsJoin.table_name, create=True)
+        query.alias_map[c.alias] = ArrayElementsJoin(c.source_expression, c.path, c.alias, parent_alias)
+        return c
+
+    def relabeled_clone(self, change_map):
+        clone = super().relabeled_clone(change_map)
+        clone.alias = change_map.get(self.alias, self.alias)
+        return clone
+
+    def as_sql(self, compiler, connection, function=None, template=None, arg_joiner=None, **extra_context):
+        lhs, params = compiler.compile(self.source_expression)
+        alias = connection.ops.quote_name(self.alias)
+        return get_backend(connection).array_element_sql(lhs, list(params), self.path, alias)
+
+
+class JSONArgument(Expression):
+    """
+    Passes an expression to a JSON function. Documents and values extracted from
+    them are passed as JSON, anything else as a plain value that is encoded by the
+    function. With ``as_text``, JSON strings are passed as plain text instead.
+    """
+
+    def __init__(self, expression, as_text=False):
+        super().__init__()
+        self.source_expression = expression
+        self.as_text = as_text
+
+    def get_source_expressions(self):
+        return [self.source_expression]
+
+    def set_source_expressions(self, exprs):
+        self.source_expression, = exprs
+
+    def _resolve_output_field(self):
+        return self.source_expression.output_field
+
+    def as_sql(self, compiler, connection):
+        sql, params = compiler.compile(self.source_expression)
+        if not isinstance(self.source_expression.output_field, FallbackJSONField):
+            return sql, params
+        backend = get_backend(connection)
+        if self.as_text:
+            return backend.json_text_sql(sql, list(params))
+        return backend.json_argument_sql(sql, list(params))
+
+
+class JSONAggregate(Aggregate):
+    """
+    Base class for aggregates building a JSON document. The function is chosen by
+    the backend.
+    """
+    agg_function = None
+
+    def __init__(self, *expressions, output_field=FallbackJSONField(), **extra):
+        super().__init__(*expressions, output_field=output_field, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        extra_context['function'] = getattr(get_backend(connection), self.agg_function)()
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class JSONArrayAgg(JSONAggregate):
+    """
+    A JSON array of the values of ``expression`` in each group.
+    """
+    agg_function = 'array_agg_function'
+
+    def __init__(self, expression, **extra):
+        expression, = self._parse_expressions(expression)
+        super().__init__(JSONArgument(expression), **extra)
+
+
+class JSONObjectAgg(JSONAggregate):
+    """
+    A JSON object mapping the values of ``key`` to the values of ``value`` in each
+    group. Keys must not be ``NULL``.
+    """
+    agg_function = 'object_agg_function'
+
+    def __init__(self, key, value, **extra):
+        key, value = self._parse_expressions(key, value)
+        # A single source expression, as SQLite rejects aggregates over several
+        # ones on Django 2.2, taking them for DISTINCT aggregates
+        super().__init__(ExpressionList(JSONArgument(key, as_text=True), JSONArgument(value)), **extra)
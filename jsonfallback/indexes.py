@@ -0,0 +1,263 @@
+import hashlib
+from decimal import Decimal
+
+import django
+from django.contrib.postgres.indexes import GinIndex
+from django.db.backends.ddl_references import Statement
+from django.db.backends.utils import split_identifier
+from django.db.models import CharField, Index
+
+from .backends import get_backend
+
+# Kinds of generated columns, by the internal type of the output field
+PATH_INDEX_TYPES = {
+    'CharField': 'text',
+    'IntegerField': 'integer',
+    'BigIntegerField': 'integer',
+    'SmallIntegerField': 'integer',
+    'PositiveIntegerField': 'integer',
+    'PositiveSmallIntegerField': 'integer',
+    'FloatField': 'number',
+    'DecimalField': 'number',
+    'BooleanField': 'boolean',
+}
+
+# Python values that compare the same way in the column as in the document
+PATH_INDEX_VALUES = {
+    'text': (str,),
+    'integer': (int,),
+    'number': (int, float, Decimal),
+    'boolean': (bool,),
+}
+
+
+def names_digest(*args, length):
+    """
+    The same as ``django.db.backends.utils.names_digest()``, which only exists
+    since Django 2.2.
+    """
+    h = hashlib.md5()
+    for arg in args:
+        h.update(arg.encode())
+    return h.hexdigest()[:length]
+
+
+def skipped_index_sql(index, connection):
+    """
+    Django executes whatever an index returns, so indexes the database has no use
+    for are replaced by a statement that does nothing.
+    """
+    return Statement('SELECT 1 /* %(name)s is not used on %(vendor)s */', name=index.name, vendor=connection.vendor)
+
+
+class KeyPathIndex(Index):
+    """
+    Base class for indexes on a single key path of a ``FallbackJSONField``. The
+    values at the path are indexed as the type of ``output_field``.
+    """
+    # Internal types of output fields the index supports
+    output_types = ()
+
+    def __init__(self, *, fields=(), path, output_field=None, name=None, db_tablespace=None):
+        if len(fields) != 1:
+            raise ValueError('{} requires exactly one field.'.format(self.__class__.__name__))
+        if isinstance(path, str):
+            path = path.split('.')
+        self.path = tuple(str(key) for key in path)
+        if not self.path:
+            raise ValueError('{} requires a key path.'.format(self.__class__.__name__))
+        self.output_field = output_field or CharField(max_length=255)
+        if self.output_field.get_internal_type() not in self.output_types:
+            raise ValueError('{} does not support {} values.'.format(
+                self.__class__.__name__, self.output_field.get_internal_type()
+            ))
+        super().__init__(fields=fields, name=name, db_tablespace=db_tablespace)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        kwargs['path'] = list(self.path)
+        kwargs['output_field'] = self.output_field
+        return path, args, kwargs
+
+    def set_name_with_model(self, model):
+        # Like Index.set_name_with_model(), but with the key path in the hash, so
+        # that indexes on different paths of the same field get different names.
+        _, table_name = split_identifier(model._meta.db_table)
+        column_name = model._meta.get_field(self.fields[0]).column
+        hash_data = [table_name, column_name] + list(self.path) + [self.suffix]
+        self.name = '%s_%s_%s' % (
+            table_name[:11],
+            column_name[:7],
+            '%s_%s' % (names_digest(*hash_data, length=6), self.suffix),
+        )
+        if hasattr(self, 'check_name'):
+            # Removed in Django 3.0, which checks the name in the system checks
+            self.check_name()
+
+    def __repr__(self):
+        return "<%s: fields='%s', path='%s'>" % (self.__class__.__name__, ', '.join(self.fields), '.'.join(self.path))
+
+    def __eq__(self, other):
+        # Fields only compare equal to themselves, so compare their definitions
+        def key(index):
+            path, args, kwargs = index.deconstruct()
+            kwargs['output_field'] = kwargs['output_field'].deconstruct()[1:]
+            return path, args, kwargs
+
+        return self.__class__ == other.__class__ and key(self) == key(other)
+
+
+class JSONPathIndex(KeyPathIndex):
+    """
+    Index on a single key path of a ``FallbackJSONField``.
+
+    On MySQL and MariaDB, the value at the path is exposed through a virtual
+    generated column of the type of ``output_field``, which is then indexed.
+    Key lookups on exactly this path are compiled against the column. On
+    PostgreSQL, this is an expression index on the ``->>`` value of the path,
+    cast to ``output_field`` unless that is a ``CharField``. On other databases,
+    the index is skipped.
+    """
+    suffix = 'jpi'
+    output_types = tuple(PATH_INDEX_TYPES)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.value_type = PATH_INDEX_TYPES[self.output_field.get_internal_type()]
+
+    @property
+    def column(self):
+        """
+        Name of the generated column on databases that use one.
+        """
+        return self.name
+
+    def accepts(self, value):
+        """
+        Whether a lookup against ``value`` can use the generated column.
+        """
+        if isinstance(value, bool) and self.value_type != 'boolean':
+            return False
+        return isinstance(value, PATH_INDEX_VALUES[self.value_type])
+
+    def create_sql(self, model, schema_editor, using=''):
+        statement = get_backend(schema_editor.connection).path_index_sql(schema_editor, model, self)
+        return statement or skipped_index_sql(self, schema_editor.connection)
+
+    def remove_sql(self, model, schema_editor):
+        statement = get_backend(schema_editor.connection).remove_path_index_sql(schema_editor, model, self)
+        return statement or skipped_index_sql(self, schema_editor.connection)
+
+
+class JSONArrayIndex(KeyPathIndex):
+    """
+    Index on the elements of an array at a key path, for the ``member_of`` and
+    ``overlaps`` lookups. On MySQL 8.0.17+, this is a multi-valued index with
+    the elements cast to ``output_field``. On PostgreSQL, it is a GIN index on
+    the array, which serves the containment checks these lookups use there. On
+    other databases, the index is skipped.
+    """
+    suffix = 'jai'
+    output_types = (
+        'CharField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField',
+        'PositiveSmallIntegerField', 'DecimalField', 'FloatField',
+    )
+
+    def create_sql(self, model, schema_editor, using=''):
+        statement = get_backend(schema_editor.connection).array_index_sql(schema_editor, model, self)
+        return statement or skipped_index_sql(self, schema_editor.connection)
+
+    def remove_sql(self, model, schema_editor):
+        statement = get_backend(schema_editor.connection).remove_array_index_sql(schema_editor, model, self)
+        return statement or skipped_index_sql(self, schema_editor.connection)
+
+
+class JSONSearchIndex(KeyPathIndex):
+    """
+    Full-text index on the strings at a key path, for the ``search`` lookup. On
+    PostgreSQL, this is a GIN index on ``to_tsvector(config, ...)`` of the ``->>``
+    value of the path. On MySQL and MariaDB, the strings are copied into a stored
+    generated column with a FULLTEXT index. On SQLite, they are copied into an
+    FTS5 table by triggers; this requires an integer primary key. On other
+    databases, the index is skipped.
+    """
+    suffix = 'jsi'
+    output_types = ('CharField', 'TextField')
+
+    def __init__(self, *, config='simple', **kwargs):
+        self.config = config
+        super().__init__(**kwargs)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if self.config != 'simple':
+            kwargs['config'] = self.config
+        return path, args, kwargs
+
+    @property
+    def column(self):
+        """
+        Name of the generated column or FTS5 table on databases that use one.
+        """
+        return self.name
+
+    def create_sql(self, model, schema_editor, using=''):
+        # Django runs a single statement per index, right away when the index is
+        # added, but only after copying the rows when it rebuilds a table on SQLite.
+        # Several statements are deferred to the end of the migration instead,
+        # which keeps them in order in both cases.
+        statements = get_backend(schema_editor.connection).search_index_sql(schema_editor, model, self)
+        if not statements:
+            return skipped_index_sql(self, schema_editor.connection)
+        if len(statements) == 1:
+            return statements[0]
+        schema_editor.deferred_sql.extend(statements)
+        return Statement('SELECT 1 /* %(name)s is created by deferred statements */', name=self.name)
+
+    def remove_sql(self, model, schema_editor):
+        # Django only removes indexes right away, so all but the last statement
+        # are executed before.
+        statements = get_backend(schema_editor.connection).remove_search_index_sql(schema_editor, model, self)
+        if not statements:
+            return skipped_index_sql(self, schema_editor.connection)
+        for statement in statements[:-1]:
+            schema_editor.execute(statement)
+        return statements[-1]
+
+
+class JSONGinIndex(GinIndex):
+    """
+    GIN index for the ``contains``, ``contained_by`` and ``has_key`` lookups on
+    PostgreSQL. ``opclasses=['jsonb_path_ops']`` gives a smaller index that only
+    supports ``contains``. On other databases, the index is skipped.
+    """
+
+    def __init__(self, *, opclasses=(), **kwargs):
+        if django.VERSION >= (2, 2):
+            super().__init__(opclasses=opclasses, **kwargs)
+        else:
+            # Index only accepts opclasses since Django 2.2
+            super().__init__(**kwargs)
+            self.opclasses = list(opclasses)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        if self.opclasses:
+            kwargs['opclasses'] = self.opclasses
+        return path, args, kwargs
+
+    def create_sql(self, model, schema_editor, using=''):
+        if not get_backend(schema_editor.connection).native:
+            return skipped_index_sql(self, schema_editor.connection)
+        statement = super().create_sql(model, schema_editor, using)
+        if self.opclasses and django.VERSION < (2, 2):
+            statement.parts['columns'] = ', '.join(
+                '{} {}'.format(schema_editor.quote_name(model._meta.get_field(field_name).column), opclass)
+                for field_name, opclass in zip(self.fields, self.opclasses)
+            )
+        return statement
+
+    def remove_sql(self, model, schema_editor):
+        if not get_backend(schema_editor.connection).native:
+            return skipped_index_sql(self, schema_editor.connection)
+        return super().remove_sql(model, schema_editor)
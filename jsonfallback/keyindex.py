@@ -0,0 +1,135 @@
+import hashlib
+import json
+
+from django.db import models
+from django.db.models.signals import post_save
+
+from .fields import FallbackJSONField
+from .lazy import unwrap
+
+
+def document_paths(value, prefix=()):
+    """
+    Yields the key path of every key of every object in the document, including
+    objects nested in arrays.
+    """
+    if isinstance(value, dict):
+        for key, val in value.items():
+            path = prefix + (str(key),)
+            yield path
+            yield from document_paths(val, path)
+    elif isinstance(value, list):
+        for i, val in enumerate(value):
+            yield from document_paths(val, prefix + (str(i),))
+
+
+def encode_path(path):
+    """
+    Returns the value of the ``path`` column for a key path. Paths that do not fit
+    the column are replaced by their digest.
+    """
+    encoded = json.dumps(list(path), ensure_ascii=False, separators=(',', ':'))
+    if len(encoded) > 255:
+        return '#' + hashlib.sha256(encoded.encode()).hexdigest()
+    return encoded
+
+
+class JSONKeyIndex(models.Model):
+    """
+    Abstract base class for side tables recording the key paths of the documents
+    in a ``FallbackJSONField``. Subclasses name the field in ``json_field`` and need
+    a ``ForeignKey`` to the model of the field.
+    """
+    json_field = None
+
+    path = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+def key_indexed_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FallbackJSONField) and field.key_index is not None
+    ]
+
+
+def update_key_index(instances, field):
+    """
+    Brings the key index of ``field`` up to date with the documents of the given,
+    saved model instances.
+    """
+    if not instances:
+        return
+    index_model, fk = field.key_index
+    instances = {instance.pk: instance for instance in instances}
+    existing = {}
+    for pk, fk_value, path in index_model._default_manager.filter(**{fk.attname + '__in': list(instances)}).values_list(
+            'pk', fk.attname, 'path'):
+        existing.setdefault(fk_value, {})[path] = pk
+    removed = []
+    added = []
+    for pk, instance in instances.items():
+        paths = {encode_path(path) for path in document_paths(unwrap(getattr(instance, field.attname)))}
+        current = existing.get(pk, {})
+        removed += [index_pk for path, index_pk in current.items() if path not in paths]
+        added += [index_model(**{fk.attname: pk, 'path': path}) for path in paths if path not in current]
+    if removed:
+        index_model._default_manager.filter(pk__in=removed).delete()
+    if added:
+        index_model._default_manager.bulk_create(added)
+
+
+def rebuild_key_index(queryset, chunk_size=500):
+    """
+    Rebuilds the key indexes of all documents in ``queryset``, e.g. after
+    ``QuerySet.update()`` or ``bulk_create()``.
+    """
+    fields = key_indexed_fields(queryset.model)
+    if not fields:
+        return
+    chunk = []
+    for instance in queryset.only('pk', *[f.name for f in fields]).iterator(chunk_size=chunk_size):
+        chunk.append(instance)
+        if len(chunk) >= chunk_size:
+            for field in fields:
+                update_key_index(chunk, field)
+            chunk = []
+    for field in fields:
+        update_key_index(chunk, field)
+
+
+def index_saved_instance(sender, instance, created, raw, update_fields, **kwargs):
+    for field in key_indexed_fields(sender):
+        if update_fields is not None and field.name not in update_fields:
+            continue
+        if not created and not field.has_changed(instance):
+            continue
+        update_key_index([instance], field)
+
+
+post_save.connect(index_saved_instance, dispatch_uid='jsonfallback_key_index')
+
+
+class KeyIndexQuerySet(models.QuerySet):
+    """
+    Keeps the key indexes up to date for ``update()`` and ``bulk_create()``.
+    Deleted rows are removed from the key index through the foreign key.
+    """
+
+    def update(self, **kwargs):
+        fields = [f for f in key_indexed_fields(self.model) if f.name in kwargs or f.attname in kwargs]
+        pks = list(self.values_list('pk', flat=True)) if fields else []
+        rows = super().update(**kwargs)
+        for i in range(0, len(pks), 500):
+            rebuild_key_index(self.model._base_manager.filter(pk__in=pks[i:i + 500]))
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        # Databases that do not return the keys of new rows need rebuild_key_index()
+        created = [obj for obj in objs if obj.pk is not None]
+        for field in key_indexed_fields(self.model):
+            update_key_index(created, field)
+        return objs
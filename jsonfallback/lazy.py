@@ -0,0 +1,85 @@
+import copy
+
+from django.utils.functional import SimpleLazyObject, empty
+
+# Every attribute a decoded document can possibly have
+JSON_ATTRIBUTES = frozenset(
+    name for t in (dict, list, str, int, float, bool, type(None)) for name in dir(t)
+)
+
+
+class LazyJSON(SimpleLazyObject):
+    """
+    Proxy for a JSON document loaded from the database. The raw string is only
+    decoded when the value is first read or modified. As long as that did not
+    happen, the raw string is written back unchanged when the object is saved.
+    """
+
+    def __init__(self, raw, codec):
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        self.__dict__['_raw'] = raw
+        self.__dict__['_codec'] = codec
+        super().__init__(self._decode)
+
+    def __getattr__(self, name):
+        # Django probes values for attributes like resolve_expression while
+        # saving, which must not cause the document to be decoded.
+        if name not in JSON_ATTRIBUTES:
+            raise AttributeError(name)
+        return super().__getattr__(name)
+
+    def _decode(self):
+        return self._codec.loads(self._raw)
+
+    @property
+    def is_decoded(self):
+        return self._wrapped is not empty
+
+    @property
+    def is_unchanged(self):
+        """
+        Whether the value is known to still match the raw string.
+        """
+        return self._wrapped is empty
+
+    @property
+    def raw(self):
+        """
+        The JSON string this object was loaded from.
+        """
+        return self._raw
+
+    def has_changed(self, encoder=None):
+        """
+        Whether the value differs from the document it was loaded from. Decoded
+        values are compared by their encoding, since e.g. ``1 == True`` in Python.
+        """
+        if self.is_unchanged:
+            return False
+        original = self._codec.loads(self._raw)
+        return self._codec.dumps(self._wrapped, encoder) != self._codec.dumps(original, encoder)
+
+    def __copy__(self):
+        if self._wrapped is empty:
+            return type(self)(self._raw, self._codec)
+        return copy.copy(self._wrapped)
+
+    def __deepcopy__(self, memo):
+        if self._wrapped is empty:
+            result = type(self)(self._raw, self._codec)
+            memo[id(self)] = result
+            return result
+        return copy.deepcopy(self._wrapped, memo)
+
+
+def unwrap(value):
+    """
+    Returns the decoded document if ``value`` is a ``LazyJSON`` proxy and
+    ``value`` itself otherwise.
+    """
+    if isinstance(value, LazyJSON):
+        if value._wrapped is empty:
+            value._setup()
+        return value._wrapped
+    return value
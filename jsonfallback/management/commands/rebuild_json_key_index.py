@@ -0,0 +1,26 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from jsonfallback.keyindex import key_indexed_fields, rebuild_key_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the key indexes of JSON fields'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                            help='Models to rebuild the key indexes of. Defaults to all models with key indexes.')
+
+    def handle(self, *args, **options):
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+        else:
+            models = [model for model in apps.get_models() if key_indexed_fields(model)]
+        for model in models:
+            if not key_indexed_fields(model):
+                raise CommandError('{} has no key index'.format(model._meta.label))
+            rebuild_key_index(model._base_manager.all())
+            if options['verbosity'] >= 1:
+                self.stdout.write('Rebuilt key index of {}'.format(model._meta.label))
@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date
+
+from .fields import KEY_CASTS
+from .functions import JSONCast, parse_path
+
+
+def sort_key_alias(position):
+    return '_jsonfallback_sort_{}'.format(position)
+
+
+class KeysetPage:
+    """
+    A page of a ``KeysetPaginator``. ``next_cursor`` is ``None`` on the last page.
+    """
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return '<KeysetPage of {} objects>'.format(len(self.object_list))
+
+
+class KeysetPaginator:
+    """
+    Pages through ``queryset`` ordered by values in the documents of ``field_name``
+    and the primary key, continuing after the last row of the previous page instead
+    of using an offset.
+
+    ``keys`` is a list of paths, e.g. ``'title'``, or ``(path, cast)`` pairs, e.g.
+    ``('publication.year', 'int')``, using the casts of ``JSONCast``. Paths without a
+    cast are compared as text. A path prefixed with ``-`` is sorted descending; the
+    primary key is sorted like the last path. Documents without a value at any of
+    the paths are left out.
+    """
+
+    def __init__(self, queryset, field_name, keys, per_page=50):
+        if not keys:
+            raise ValueError('At least one key is required.')
+        self.queryset = queryset
+        self.field_name = field_name
+        self.keys = [self.parse_key(key) for key in keys]
+        self.per_page = per_page
+
+    @staticmethod
+    def parse_key(key):
+        path, cast = (key, 'text') if isinstance(key, str) else key
+        if cast not in KEY_CASTS:
+            raise ValueError('Unknown cast: {}'.format(cast))
+        descending = isinstance(path, str) and path.startswith('-')
+        if descending:
+            path = path[1:]
+        return parse_path(path), cast, descending
+
+    def get_queryset(self):
+        """
+        The queryset in page order, with the typed values annotated.
+        """
+        qs = self.queryset.annotate(**{
+            sort_key_alias(i): JSONCast(self.field_name, path, cast)
+            for i, (path, cast, descending) in enumerate(self.keys)
+        }).filter(**{
+            sort_key_alias(i) + '__isnull': False for i in range(len(self.keys))
+        })
+        ordering = [
+            F(sort_key_alias(i)).desc() if descending else F(sort_key_alias(i)).asc()
+            for i, (path, cast, descending) in enumerate(self.keys)
+        ]
+        return qs.order_by(*ordering, '-pk' if self.keys[-1][2] else 'pk')
+
+    def seek_filter(self, values):
+        """
+        Matches the rows after ``values`` in page order. The range on the first key
+        is repeated outside of the disjunction, so it can be served from an index on
+        that key alone.
+        """
+        columns = [
+            (sort_key_alias(i), descending) for i, (path, cast, descending) in enumerate(self.keys)
+        ] + [('pk', self.keys[-1][2])]
+        after = Q()
+        for i, ((name, descending), value) in enumerate(zip(columns, values)):
+            condition = Q(**{'{}__{}'.format(name, 'lt' if descending else 'gt'): value})
+            for (previous, _), previous_value in zip(columns[:i], values):
+                condition &= Q(**{previous: previous_value})
+            after |= condition
+        name, descending = columns[0]
+        return Q(**{'{}__{}'.format(name, 'lte' if descending else 'gte'): values[0]}) & after
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, sort_key_alias(i)) for i in range(len(self.keys))] + [obj.pk]
+        data = json.dumps([
+            value if isinstance(value, (bool, int, float, str)) else str(value) for value in values
+        ], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+            if not isinstance(values, list) or len(values) != len(self.keys) + 1:
+                raise ValueError
+            decoded = []
+            for (path, cast, descending), value in zip(self.keys, values):
+                if cast == 'decimal':
+                    value = Decimal(value)
+                elif cast == 'date':
+                    value = parse_date(value)
+                if value is None:
+                    raise ValueError
+                decoded.append(value)
+            decoded.append(self.queryset.model._meta.pk.to_python(values[-1]))
+        except (ArithmeticError, TypeError, ValueError, ValidationError, binascii.Error):
+            raise ValueError('Invalid cursor.')
+        return decoded
+
+    def page(self, cursor=None):
+        """
+        The page after ``cursor``, or the first page.
+        """
+        qs = self.get_queryset()
+        if cursor is not None:
+            qs = qs.filter(self.seek_filter(self.decode_cursor(cursor)))
+        objects = list(qs[:self.per_page + 1])
+        if len(objects) <= self.per_page:
+            return KeysetPage(objects, None)
+        objects = objects[:self.per_page]
+        return KeysetPage(objects, self.encode_cursor(objects[-1]))
@@ -0,0 +1,77 @@
+from django.db.models import QuerySet, signals
+from django.db.models.query import ModelIterable
+
+from .functions import JSONProjection
+
+
+def projection_alias(field):
+    return '_jsonfallback_partial_{}'.format(field.attname)
+
+
+def check_partial_save(sender, instance, using=None, update_fields=None, **kwargs):
+    """
+    ``pre_save`` receiver refusing to overwrite documents with the partial ones
+    loaded by ``only_json()``. Django sends ``pre_save`` before it opens the
+    transaction of the save, which an exception raised by the field would break.
+    """
+    for attname, value in getattr(instance, '_jsonfallback_partial', {}).items():
+        field = sender._meta.get_field(attname)
+        if update_fields is not None and field.name not in update_fields:
+            continue
+        if instance.__dict__.get(attname) is value and field.has_changed(instance, using):
+            raise ValueError(
+                "Cannot save '{}' of {}, it was loaded partially with only_json().".format(
+                    field.name, sender.__name__
+                )
+            )
+
+
+class PartialJSONIterable(ModelIterable):
+    """
+    Moves projected documents from their annotations into their fields and marks
+    them as partial on the instance.
+    """
+
+    def __iter__(self):
+        fields = self.queryset._json_projections
+        for obj in super().__iter__():
+            partial = {}
+            for field in fields:
+                value = obj.__dict__.pop(projection_alias(field))
+                obj.__dict__[field.attname] = value
+                partial[field.attname] = value
+            obj._jsonfallback_partial = partial
+            yield obj
+
+
+class PartialJSONQuerySet(QuerySet):
+    """
+    Adds ``only_json()``, which loads only parts of the documents of a
+    ``FallbackJSONField``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._json_projections = ()
+
+    def only_json(self, field_name, paths):
+        """
+        Loads only the values at ``paths`` of the documents of ``field_name``. The
+        reduced documents are built in the database, so the rest of the documents
+        is neither transferred nor decoded. Saving an instance with a partial
+        document raises ``ValueError`` unless the document is replaced or left out
+        with ``update_fields``.
+        """
+        field = self.model._meta.get_field(field_name)
+        clone = self.defer(field.name).annotate(**{
+            projection_alias(field): JSONProjection(field.name, paths, output_field=field),
+        })
+        clone._json_projections = tuple(f for f in self._json_projections if f != field) + (field,)
+        clone._iterable_class = PartialJSONIterable
+        signals.pre_save.connect(check_partial_save, sender=self.model, weak=False, dispatch_uid='jsonfallback_partial')
+        return clone
+
+    def _clone(self):
+        c = super()._clone()
+        c._json_projections = self._json_projections
+        return c
@@ -0,0 +1,45 @@
+import threading
+
+
+def fingerprint(text):
+    """
+    A digest of the text of a document as the database returns it, to tell later
+    whether the document changed without keeping the text around. The hash of the
+    string is keyed per process and 64 bits wide, which makes accidental matches
+    negligible at a fraction of the cost of a cryptographic digest.
+    """
+    if isinstance(text, bytes):
+        text = text.decode()
+    return hash(text)
+
+
+class LoadedDocuments(threading.local):
+    """
+    The document each model field decoded last in this thread as ``(attname,
+    document, fingerprint, alias)``, by ``id()`` of the field. Query results are
+    converted row by row right before the model instances of the row are
+    initialized, which take their documents from here.
+    """
+
+    def __init__(self):
+        self.documents = {}
+
+
+loaded_documents = LoadedDocuments()
+
+
+def remember_loaded_documents(sender, instance, **kwargs):
+    """
+    ``post_init`` receiver keeping the fingerprints of the documents ``instance``
+    was loaded with, so that saving it can tell whether they changed. They are
+    kept along with the primary key and the database alias of the row, as they
+    only describe what is stored there.
+    """
+    documents = loaded_documents.documents
+    if not documents:
+        return
+    values = instance.__dict__
+    for key, (attname, document, digest, alias) in list(documents.items()):
+        if attname in values and values[attname] is document:
+            del documents[key]
+            values.setdefault('_jsonfallback_fingerprints', {})[attname] = (document, digest, instance.pk, alias)
@@ -1,3 +1,4 @@
+import copy
 import os
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
@@ -5,3 +6,46 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
 import django
 
 django.setup()
+
+import pytest
+from django.db import connection
+
+from jsonfallback.backends import get_backend
+
+BOOKS = (
+    {'title': 'The Lord of the Rings', 'author': 'Tolkien', 'publication': {'year': 1954}},
+    {'title': 'Harry Potter', 'author': 'Rowling', 'publication': {'year': 1997}},
+)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'json_queries: queries into documents, skipped where the text fallback backend is used'
+    )
+
+
+@pytest.fixture(autouse=True)
+def skip_without_json_queries(request):
+    # Resolving the backend may query the server, so wait for the test database
+    if request.node.get_closest_marker('json_queries') is None:
+        return
+    request.getfixturevalue('django_db_setup')
+    with request.getfixturevalue('django_db_blocker').unblock():
+        if get_backend(connection).name == 'text':
+            pytest.skip('Queries into documents are not supported on this database')
+
+
+@pytest.fixture
+def book_model():
+    from .testapp.models import Book
+
+    return Book
+
+
+@pytest.fixture
+def books(book_model):
+    """
+    The ``BOOKS`` saved as instances of ``book_model``, which test modules override
+    to use another model.
+    """
+    return tuple(book_model.objects.create(data=copy.deepcopy(data)) for data in BOOKS)
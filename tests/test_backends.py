@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.db import NotSupportedError, connection
+from jsonfallback.backends import (
+    MariaDBBackend, MySQLBackend, get_backend, normalized_dumps,
+)
+from jsonfallback.fields import JsonAdapter
+
+
+def test_backend_resolved_once():
+    backend = get_backend(connection)
+    assert get_backend(connection) is backend
+    assert backend.engine == settings.DATABASES['default']['ENGINE']
+
+
+def test_backend_kind():
+    engine = settings.DATABASES['default']['ENGINE']
+    name = get_backend(connection).name
+    if 'postgres' in engine:
+        assert name == 'postgres'
+    elif 'mysql' in engine:
+        assert name in ('mysql', 'mariadb')
+    elif 'sqlite' in engine:
+        assert name == 'sqlite'
+
+
+def test_key_path_flattened():
+    from tests.testapp.models import Book
+
+    qs = Book.objects.filter(data__a__b__0__c=1)
+    transform = qs.query.where.children[0].lhs
+    assert transform.key_path == ('a', 'b', '0', 'c')
+    sql, params = qs.query.sql_with_params()
+    assert 'a' in str(params) and 'c' in str(params)
+
+
+def test_normalized_dumps():
+    # How PostgreSQL prints '{"bb": [1, {"é": 2}], "a": null, "c": true}'::jsonb
+    value = {'bb': [1, {'\xe9': 2}], 'a': None, 'c': True}
+    assert normalized_dumps(value, None) == '{"a": null, "c": true, "bb": [1, {"\xe9": 2}]}'
+
+
+@pytest.mark.parametrize('backend_class,version,supported', [
+    (MySQLBackend, (5, 7, 30), False),
+    (MySQLBackend, (8, 0, 20), True),
+    (MariaDBBackend, (10, 5, 9), False),
+    (MariaDBBackend, (10, 6, 4), True),
+])
+def test_array_elements_join_needs_json_table(backend_class, version, supported):
+    backend = backend_class(SimpleNamespace(settings_dict={'ENGINE': 'django.db.backends.mysql'}, mysql_version=version))
+    if supported:
+        assert 'JSON_TABLE' in backend.array_elements_join_sql('`data`', [], ('tags',), '`t`')[0]
+    else:
+        with pytest.raises(NotSupportedError):
+            backend.array_elements_join_sql('`data`', [], ('tags',), '`t`')
+
+
+@pytest.mark.parametrize('values,column', [
+    (['Tolkien'] * 100, 'LONGTEXT'),
+    ([1954] * 100, 'BIGINT'),
+    (['Tolkien'] * 99 + [1954], None),
+    ([True] * 100, None),
+    (['Tolkien'] * 99, None),
+])
+def test_mysql_key_in_typed_column(values, column):
+    backend = MySQLBackend(SimpleNamespace(settings_dict={'ENGINE': 'django.db.backends.mysql'}, mysql_version=(8, 0, 20)))
+    result = backend.key_in_sql('`data`', [], ('author',), [JsonAdapter(v) for v in values])
+    if column is None:
+        assert result is None
+    else:
+        assert '`value` {}'.format(column) in result[0]
+        assert 'JSON PATH' not in result[0]
+
+
+@pytest.mark.django_db
+def test_mysql_key_in_long_list(books):
+    if get_backend(connection).name != 'mysql' or not get_backend(connection).json_table:
+        pytest.skip('Long key__in lists are passed as one array on MySQL 8.0.4+ only')
+    from tests.testapp.models import Book
+
+    authors = ['Author {}'.format(i) for i in range(500)]
+    assert Book.objects.filter(data__author__in=authors + ['Tolkien']).count() == 1
+    assert Book.objects.filter(data__author__in=authors + ['tolkien', 'Tolkien ']).count() == 0
+    years = list(range(1000, 1960))
+    assert Book.objects.filter(data__publication__year__in=years).count() == 1
+    assert Book.objects.filter(data__publication__year__in=[str(y) for y in years]).count() == 0
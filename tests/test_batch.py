@@ -0,0 +1,63 @@
+import gc
+
+import pytest
+from jsonfallback.batch import BatchedJSON, end_batch
+from jsonfallback.codecs import JSONCodec
+
+from .testapp.models import BatchedBook
+
+
+class CountingCodec(JSONCodec):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def loads(self, s):
+        self.calls += 1
+        return super().loads(s)
+
+
+def test_decoded_in_one_call():
+    codec = CountingCodec()
+    end_batch()
+    values = [BatchedJSON('{"a": %d}' % i, codec) for i in range(3)]
+    assert values[1]['a'] == 1
+    assert codec.calls == 1
+    assert all(v.is_decoded for v in values)
+    assert values == [{'a': 0}, {'a': 1}, {'a': 2}]
+    assert codec.calls == 1
+
+
+def test_unreferenced_documents_skipped():
+    codec = CountingCodec()
+    end_batch()
+    first = BatchedJSON('{"a": 1}', codec)
+    BatchedJSON('{"a": 2}', codec)
+    gc.collect()
+    assert first == {'a': 1}
+    assert codec.calls == 1
+
+
+@pytest.mark.django_db
+def test_queryset_decoded_together():
+    for i in range(3):
+        BatchedBook.objects.create(data={'number': i})
+    books = list(BatchedBook.objects.order_by('pk'))
+    assert books[0].data['number'] == 0
+    assert all(b.data.is_decoded for b in books)
+    assert list(BatchedBook.objects.order_by('pk').values_list('data', flat=True)) == [
+        {'number': 0}, {'number': 1}, {'number': 2}
+    ]
+
+
+@pytest.mark.django_db
+def test_iterator_decoded_per_chunk():
+    for i in range(3):
+        BatchedBook.objects.create(data={'number': i})
+    books = BatchedBook.objects.order_by('pk').iterator(chunk_size=2)
+    first, second = next(books), next(books)
+    assert first.data['number'] == 0
+    assert second.data.is_decoded
+    third = next(books)
+    assert not third.data.is_decoded
+    assert third.data == {'number': 2}
@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from jsonfallback.backends import get_backend
+from jsonfallback.functions import JSONExtract, JSONSet
+
+from .testapp.models import BinaryBook
+
+
+@pytest.fixture
+def book_model():
+    return BinaryBook
+
+
+@pytest.fixture
+def queryable(books):
+    if get_backend(connection).name == 'text':
+        pytest.skip('Not supported on this database')
+    return books
+
+
+@pytest.mark.django_db
+def test_binary_storage(books):
+    backend = get_backend(connection)
+    if backend.name == 'sqlite' and backend.jsonb:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT typeof(data) FROM testapp_binarybook')
+            assert cursor.fetchone()[0] == 'blob'
+    assert BinaryBook.objects.get(pk=books[0].pk).data == books[0].data
+    assert BinaryBook.objects.filter(pk=books[1].pk).values_list('data', flat=True)[0] == books[1].data
+
+
+@pytest.mark.django_db
+def test_binary_queries(queryable):
+    assert BinaryBook.objects.filter(data__author='Tolkien').count() == 1
+    assert BinaryBook.objects.filter(data__publication__year__gt=1960).count() == 1
+    assert BinaryBook.objects.filter(data__title__startswith='Harry').count() == 1
+    assert BinaryBook.objects.filter(data__contains={'author': 'Rowling'}).count() == 1
+    assert BinaryBook.objects.filter(data__has_key='publication').count() == 2
+    assert BinaryBook.objects.filter(data={'title': 'Harry Potter', 'author': 'Rowling', 'publication': {'year': 1997}}).count() == 1
+    assert list(BinaryBook.objects.annotate(a=JSONExtract('data', 'author')).order_by('a').values_list('a', flat=True)) == [
+        'Rowling', 'Tolkien'
+    ]
+
+
+@pytest.mark.django_db
+def test_binary_update(queryable):
+    BinaryBook.objects.filter(data__author='Tolkien').update(data=JSONSet('data', 'publication.year', 1955))
+    assert BinaryBook.objects.get(pk=queryable[0].pk).data['publication'] == {'year': 1955}
+    assert BinaryBook.objects.filter(data__publication__year=1955).count() == 1
@@ -0,0 +1,85 @@
+import copy
+
+import pytest
+from jsonfallback.cache import (
+    DecodeCache, FrozenDict, SharedJSON, get_decode_cache,
+)
+from jsonfallback.codecs import get_codec
+
+from .testapp.models import CachedBook
+
+
+@pytest.fixture
+def cache():
+    cache = get_decode_cache()
+    cache.clear()
+    return cache
+
+
+def test_lru_eviction():
+    codec = get_codec('json')
+    cache = DecodeCache(max_size=20)
+    first = cache.get('{"a": 1}', codec)
+    assert cache.get('{"a": 1}', codec) is first
+    cache.get('{"b": 2}', codec)
+    cache.get('{"c": 3}', codec)
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'evictions': 1, 'entries': 2, 'size': 16, 'max_size': 20}
+    assert cache.get('{"a": 1}', codec) is not first
+
+
+def test_oversized_documents_not_cached():
+    cache = DecodeCache(max_size=4)
+    assert cache.get('{"a": 1}', get_codec('json')) == {'a': 1}
+    assert cache.stats()['entries'] == 0
+
+
+def test_frozen_copies_are_mutable():
+    value = SharedJSON('{"a": {"b": [1, 2]}}', get_codec('json'))
+    assert isinstance(value['a'], FrozenDict)
+    with pytest.raises(TypeError):
+        value['a']['c'] = 1
+    with pytest.raises(TypeError):
+        value['a']['b'].append(3)
+    private = copy.deepcopy(value['a'])
+    private['b'].append(3)
+    assert private == {'b': [1, 2, 3]}
+    assert value['a'] == {'b': [1, 2]}
+
+
+@pytest.mark.django_db
+def test_shared_between_rows(cache):
+    CachedBook.objects.create(data={'status': 'ok', 'flags': ['a']})
+    CachedBook.objects.create(data={'status': 'ok', 'flags': ['a']})
+    a, b = CachedBook.objects.all()
+    assert a.data == b.data == {'status': 'ok', 'flags': ['a']}
+    assert a.data['flags'] is b.data['flags']
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+@pytest.mark.django_db
+def test_copy_on_write(cache):
+    CachedBook.objects.create(data={'status': 'ok'})
+    CachedBook.objects.create(data={'status': 'ok'})
+    a, b = CachedBook.objects.all()
+    a.data['status'] = 'failed'
+    a.data.update({'retries': 1})
+    assert a.data == {'status': 'failed', 'retries': 1}
+    assert b.data == {'status': 'ok'}
+    a.save()
+    b.save()
+    assert b.data.is_unchanged
+    assert sorted(CachedBook.objects.values_list('data', flat=True), key=len) == [
+        {'status': 'ok'}, {'status': 'failed', 'retries': 1}
+    ]
+
+
+@pytest.mark.django_db
+def test_thaw_nested(cache):
+    CachedBook.objects.create(data={'publication': {'year': 1954}})
+    a = CachedBook.objects.get()
+    a.data.thaw()
+    a.data['publication']['year'] = 1955
+    a.full_clean()
+    a.save()
+    assert CachedBook.objects.get().data == {'publication': {'year': 1955}}
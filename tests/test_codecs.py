@@ -0,0 +1,98 @@
+import json
+from datetime import date, datetime
+
+import pytest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from jsonfallback.codecs import PROFILES, EncodingProfile, get_codec
+from jsonfallback.fields import FallbackJSONField
+
+CODECS = ['json', 'orjson', 'ujson']
+
+
+def codec_or_skip(name):
+    if name != 'json':
+        pytest.importorskip(name)
+    return get_codec(name)
+
+
+class UppercaseEncoder(json.JSONEncoder):
+    def encode(self, o):
+        return super().encode(o).upper()
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_sorted_keys(name):
+    codec = codec_or_skip(name)
+    encoded = codec.dumps({'b': 1, 'a': {'d': 2, 'c': 3}})
+    assert encoded.index('"a"') < encoded.index('"b"')
+    assert encoded.index('"c"') < encoded.index('"d"')
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_roundtrip(name):
+    codec = codec_or_skip(name)
+    value = {'title': 'Der Herr der Ringe', 'tags': ['ü', 1, 2.5, None, True], 'big': 2 ** 70}
+    assert codec.loads(codec.dumps(value)) == value
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_encoder_default(name):
+    codec = codec_or_skip(name)
+    value = {'date': date(1954, 7, 29), 'datetime': datetime(1954, 7, 29, 12, 30, 15, 123456)}
+    assert json.loads(codec.dumps(value, DjangoJSONEncoder)) == json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+    with pytest.raises(TypeError):
+        codec.dumps(value)
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_custom_encoder_falls_back(name):
+    codec = codec_or_skip(name)
+    assert codec.dumps({'a': 'b'}, UppercaseEncoder) == '{"A": "B"}'
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_encoding_profiles(name):
+    codec = codec_or_skip(name)
+    value = {'b': 'Herr der Ringe', 'a': 'Властелин колец'}
+    encoded = codec.dumps(value, profile=PROFILES['compact'])
+    assert encoded.index('"a"') < encoded.index('"b"')
+    assert 'Властелин' in encoded and '", "' not in encoded
+    encoded = codec.dumps(value, profile=PROFILES['unsorted'])
+    assert encoded.index('"b"') < encoded.index('"a"')
+    assert codec.loads(encoded) == value
+
+
+def test_encoding_profile_separators():
+    codec = get_codec('json')
+    assert codec.dumps({'a': [1, 'ü']}) == '{"a": [1, "\\u00fc"]}'
+    assert codec.dumps({'a': [1, 'ü']}, profile=EncodingProfile(separators=(',', ':'))) == '{"a":[1,"\\u00fc"]}'
+
+
+def test_field_encoding():
+    field = FallbackJSONField(encoding='compact')
+    assert field.encoding_profile is PROFILES['compact']
+    assert field.deconstruct()[3]['encoding'] == 'compact'
+    value = field.get_db_prep_value({'b': 'ü', 'a': 1}, connection)
+    if isinstance(value, str):
+        assert value == '{"a":1,"b":"ü"}'
+    field = FallbackJSONField(encoding='sorted')
+    field.name = 'data'
+    assert [e.id for e in field._check_encoding()] == ['jsonfallback.E003']
+
+
+def test_field_codec():
+    pytest.importorskip('orjson')
+    field = FallbackJSONField(codec='orjson', encoder=DjangoJSONEncoder)
+    assert field.json_codec.name == 'orjson'
+    assert field.deconstruct()[3]['codec'] == 'orjson'
+    value = field.get_db_prep_value({'b': date(1954, 7, 29), 'a': 1}, connection)
+    if isinstance(value, str):
+        assert value == '{"a":1,"b":"1954-07-29"}'
+        assert field.from_db_value(value, None, connection) == {'a': 1, 'b': '1954-07-29'}
+
+
+def test_unknown_codec():
+    field = FallbackJSONField(codec='jsonfallback.codecs.DoesNotExist')
+    field.name = 'data'
+    assert [e.id for e in field._check_codec()] == ['jsonfallback.E002']
@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from jsonfallback.backends import get_backend
+from jsonfallback.compression import MAGIC, get_compressor
+
+from .testapp.models import CompressedBook
+
+COMPRESSIONS = ['zlib', 'zstd']
+
+
+def compressor_or_skip(name, dictionary_path=None):
+    if name == 'zstd':
+        pytest.importorskip('zstandard')
+    return get_compressor(name, dictionary_path)
+
+
+@pytest.mark.parametrize('name', COMPRESSIONS)
+def test_roundtrip(name):
+    compressor = compressor_or_skip(name)
+    value = '{"title": "Der Herr der Ringe", "tags": ["ü"], "chapters": %s}' % list(range(100))
+    compressed = compressor.compress(value)
+    assert compressed.startswith(MAGIC)
+    assert len(compressed) < len(value)
+    assert compressor.decompress(compressed) == value
+    assert compressor.decompress(memoryview(compressed)) == value
+
+
+@pytest.mark.parametrize('name', COMPRESSIONS)
+def test_uncompressed_rows(name):
+    compressor = compressor_or_skip(name)
+    assert compressor.decompress('{"a": 1}') == '{"a": 1}'
+    assert compressor.decompress('{"ü": 1}'.encode()) == '{"ü": 1}'
+
+
+@pytest.mark.parametrize('name', COMPRESSIONS)
+def test_dictionary(name, tmpdir):
+    path = tmpdir.join('dictionary')
+    path.write('{"author": "Tolkien", "title": "The Lord of the Rings"}')
+    compressor = compressor_or_skip(name, str(path))
+    value = '{"author": "Tolkien", "title": "The Hobbit"}'
+    compressed = compressor.compress(value)
+    assert compressor.decompress(compressed) == value
+    assert len(compressed) < len(compressor_or_skip(name).compress(value))
+    other = tmpdir.join('other')
+    other.write('{"foo": "bar"}')
+    with pytest.raises(ValueError):
+        compressor_or_skip(name, str(other)).decompress(compressed)
+
+
+def test_switch_algorithm():
+    pytest.importorskip('zstandard')
+    compressed = get_compressor('zlib').compress('{"a": 1}')
+    assert get_compressor('zstd').decompress(compressed) == '{"a": 1}'
+
+
+@pytest.mark.django_db
+def test_compressed_storage():
+    CompressedBook.objects.create(data={'title': 'The Lord of the Rings', 'chapters': list(range(100))})
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT data FROM testapp_compressedbook')
+        raw = cursor.fetchone()[0]
+    if get_backend(connection).compressible:
+        assert bytes(raw).startswith(MAGIC)
+    assert CompressedBook.objects.get().data == {'title': 'The Lord of the Rings', 'chapters': list(range(100))}
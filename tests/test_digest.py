@@ -0,0 +1,78 @@
+from datetime import date
+
+import django
+import pytest
+from django.db import NotSupportedError, transaction
+from jsonfallback.functions import JSONSet
+
+from .testapp.models import DigestBook
+
+pytestmark = pytest.mark.skipif(django.VERSION < (2, 1), reason="Not supported on Django 2.0")
+
+
+@pytest.fixture
+def book_model():
+    return DigestBook
+
+
+@pytest.mark.django_db
+def test_digest_exact(books):
+    qs = DigestBook.objects.filter(data={'author': 'Tolkien', 'title': 'The Lord of the Rings', 'publication': {'year': 1954}})
+    assert 'data_digest' in str(qs.query)
+    assert list(qs) == [books[0]]
+    assert DigestBook.objects.filter(data={'title': 'Harry Potter'}).count() == 0
+    hobbit = DigestBook.objects.create(data={'title': 'The Hobbit', 'published': date(1937, 9, 21)})
+    assert DigestBook.objects.filter(data={'title': 'The Hobbit', 'published': date(1937, 9, 21)}).get() == hobbit
+    assert DigestBook.objects.exclude(data={'title': 'The Hobbit', 'published': '1937-09-21'}).count() == 2
+
+
+@pytest.mark.django_db
+def test_digest_in(books):
+    assert DigestBook.objects.filter(data__in=[{'author': 'Tolkien', 'title': 'The Lord of the Rings', 'publication': {'year': 1954}}, {'a': 1}]).count() == 1
+    assert DigestBook.objects.filter(data__in=[]).count() == 0
+
+
+@pytest.mark.django_db
+def test_digest_updated_on_save(books):
+    book = books[0]
+    digest = book.data_digest
+    assert digest == DigestBook._meta.get_field('data_digest').digest(
+        {'title': 'The Lord of the Rings', 'author': 'Tolkien', 'publication': {'year': 1954}}
+    )
+    book.data['author'] = 'J. R. R. Tolkien'
+    book.save()
+    assert book.data_digest != digest
+    assert DigestBook.objects.filter(
+        data={'title': 'The Lord of the Rings', 'author': 'J. R. R. Tolkien', 'publication': {'year': 1954}}
+    ).get() == book
+
+
+@pytest.mark.django_db
+def test_digest_updated_with_update_fields(books):
+    book = books[0]
+    book.data['author'] = 'J. R. R. Tolkien'
+    book.save(update_fields=['data'])
+    book = DigestBook.objects.get(pk=book.pk)
+    assert book.data_digest == DigestBook._meta.get_field('data_digest').digest(book.data)
+
+
+@pytest.mark.django_db
+def test_digest_filled_in(books):
+    DigestBook.objects.update(data_digest='')
+    for book in DigestBook.objects.filter(data_digest=''):
+        book.save(update_fields=['data_digest'])
+    for book in DigestBook.objects.all():
+        assert book.data_digest == DigestBook._meta.get_field('data_digest').digest(book.data)
+
+
+@pytest.mark.django_db
+def test_digest_refuses_update(books):
+    with pytest.raises(NotSupportedError), transaction.atomic():
+        DigestBook.objects.update(data={'title': 'The Hobbit'})
+    with pytest.raises(NotSupportedError), transaction.atomic():
+        DigestBook.objects.update(data=JSONSet('data', 'publication.year', 1955))
+    field = DigestBook._meta.get_field('data_digest')
+    DigestBook.objects.filter(pk=books[0].pk).update(
+        data={'title': 'The Hobbit'}, data_digest=field.digest({'title': 'The Hobbit'})
+    )
+    assert DigestBook.objects.filter(data={'title': 'The Hobbit'}).get() == books[0]
@@ -0,0 +1,166 @@
+import pytest
+from django.db import connection
+from django.db.models import IntegerField, TextField
+from jsonfallback.backends import get_backend
+from jsonfallback.indexes import (
+    JSONArrayIndex, JSONGinIndex, JSONPathIndex, JSONSearchIndex,
+)
+
+from .testapp.models import Book, TaggedBook
+
+
+def path_index(path):
+    return [
+        index for index in Book._meta.indexes
+        if isinstance(index, JSONPathIndex) and index.path == tuple(path.split('.'))
+    ][0]
+
+
+def test_path_index_deconstruct():
+    index = path_index('publication.year')
+    path, args, kwargs = index.deconstruct()
+    assert path == 'jsonfallback.indexes.JSONPathIndex'
+    assert kwargs['path'] == ['publication', 'year']
+    assert index.clone() == index
+    assert JSONPathIndex(fields=['data'], path='publication.year', output_field=IntegerField(),
+                         name=index.name) == index
+    assert path_index('author') != index
+
+
+def test_path_index_names_differ_by_path():
+    assert path_index('author').name != path_index('publication.year').name
+
+
+def test_path_index_invalid():
+    with pytest.raises(ValueError):
+        JSONPathIndex(fields=['data', 'id'], path='author')
+    with pytest.raises(ValueError):
+        JSONPathIndex(fields=['data'], path='author', output_field=TextField())
+
+
+def test_path_index_accepts():
+    index = path_index('publication.year')
+    assert index.accepts(1954)
+    assert not index.accepts('1954')
+    assert not index.accepts(True)
+    assert not index.accepts(1954.5)
+    assert path_index('author').accepts('Tolkien')
+
+
+@pytest.mark.django_db
+def test_path_index_lookups():
+    column = path_index('author').column
+    sql = str(Book.objects.filter(data__author='Tolkien').query)
+    assert (column in sql) == get_backend(connection).path_index_columns
+    # Values of another type are compared on the document
+    assert column not in str(Book.objects.filter(data__author=3).query)
+    assert column not in str(Book.objects.filter(data__title='Tolkien').query)
+
+
+def test_path_index_postgres():
+    if not get_backend(connection).native:
+        pytest.skip('PostgreSQL only')
+    editor = connection.schema_editor(collect_sql=True)
+    sql = str(path_index('author').create_sql(Book, editor))
+    assert """("data" ->> 'author')""" in sql
+    sql = str(path_index('publication.year').create_sql(Book, editor))
+    assert """(("data" #>> ARRAY['publication','year']))::integer""" in sql
+
+
+def test_indexes_skipped():
+    if get_backend(connection).native or get_backend(connection).path_index_columns:
+        pytest.skip('Path indexes are created on this database')
+    editor = connection.schema_editor(collect_sql=True)
+    assert str(path_index('author').create_sql(Book, editor)).startswith('SELECT 1')
+    assert str(path_index('author').remove_sql(Book, editor)).startswith('SELECT 1')
+
+
+def test_gin_index():
+    editor = connection.schema_editor(collect_sql=True)
+    index = [index for index in Book._meta.indexes if isinstance(index, JSONGinIndex)][0]
+    sql = str(index.create_sql(Book, editor))
+    if get_backend(connection).native:
+        assert 'USING gin' in sql
+    else:
+        assert sql.startswith('SELECT 1')
+
+
+def test_array_index():
+    editor = connection.schema_editor(collect_sql=True)
+    index = TaggedBook._meta.indexes[0]
+    assert index.path == ('tags',)
+    sql = str(index.create_sql(TaggedBook, editor))
+    backend = get_backend(connection)
+    if backend.native:
+        assert 'USING gin' in sql
+    elif getattr(backend, 'multi_valued', False):
+        assert 'AS CHAR(64) ARRAY' in sql
+    else:
+        assert sql.startswith('SELECT 1')
+    with pytest.raises(ValueError):
+        JSONArrayIndex(fields=['data'], path='tags', output_field=TextField())
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_array_index_lookups():
+    TaggedBook.objects.create(data={'title': 'A', 'tags': ['fantasy', 'epic']})
+    TaggedBook.objects.create(data={'title': 'B', 'tags': ['scifi']})
+    TaggedBook.objects.create(data={'title': 'C'})
+    assert TaggedBook.objects.filter(data__tags__member_of='epic').get().data['title'] == 'A'
+    assert TaggedBook.objects.filter(data__tags__overlaps=['epic', 'scifi']).count() == 2
+    assert TaggedBook.objects.filter(data__tags__overlaps=['horror']).count() == 0
+
+
+def test_search_index():
+    editor = connection.schema_editor(collect_sql=True)
+    index = [index for index in Book._meta.indexes if isinstance(index, JSONSearchIndex)][0]
+    assert index.deconstruct()[2]['path'] == ['title']
+    assert 'config' not in index.deconstruct()[2]
+    assert JSONSearchIndex(fields=['data'], path='title', config='english').deconstruct()[2]['config'] == 'english'
+    editor.deferred_sql = []
+    sql = str(index.create_sql(Book, editor))
+    assert not editor.collected_sql
+    deferred = [str(s) for s in editor.deferred_sql]
+    backend = get_backend(connection)
+    if backend.native:
+        assert "to_tsvector('simple'::regconfig, (\"data\" ->> 'title'))" in sql
+    elif backend.name in ('mysql', 'mariadb'):
+        assert 'STORED' in deferred[0]
+        assert 'FULLTEXT' in deferred[-1]
+    elif backend.name == 'sqlite':
+        assert 'USING fts5' in deferred[0]
+        assert deferred[-1].startswith('INSERT INTO')
+    else:
+        assert sql.startswith('SELECT 1')
+    with pytest.raises(ValueError):
+        JSONSearchIndex(fields=['data'], path='title', output_field=IntegerField())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_search_index_after_altering_table(books):
+    if get_backend(connection).name != 'sqlite':
+        pytest.skip('Only SQLite rebuilds tables to alter them')
+    data = Book._meta.get_field('data')
+    nullable = data.clone()
+    nullable.null = True
+    nullable.set_attributes_from_name('data')
+    nullable.model = Book
+    with connection.schema_editor(collect_sql=True) as editor:
+        editor.alter_field(Book, data, nullable)
+    # The FTS table and its triggers are set up on the renamed table
+    renamed = [i for i, sql in enumerate(editor.collected_sql) if 'RENAME TO' in sql][-1]
+    assert all(i > renamed for i, sql in enumerate(editor.collected_sql) if 'fts5' in sql or 'TRIGGER' in sql)
+    with connection.schema_editor() as editor:
+        editor.alter_field(Book, data, nullable)
+    try:
+        assert Book.objects.filter(data__title__search='rings').count() == 1
+        Book.objects.create(data={'title': 'The Hobbit'})
+        Book.objects.filter(data__title='Harry Potter').update(data={'title': 'The Silmarillion'})
+        assert Book.objects.filter(data__title__search='hobbit').count() == 1
+        assert Book.objects.filter(data__title__search='silmarillion').count() == 1
+        assert Book.objects.filter(data__title__search='potter').count() == 0
+    finally:
+        with connection.schema_editor() as editor:
+            editor.alter_field(Book, nullable, data)
+    assert Book.objects.filter(data__title__search='hobbit').count() == 1
@@ -0,0 +1,65 @@
+import pytest
+from django.core.management import call_command
+from jsonfallback.keyindex import encode_path, rebuild_key_index
+
+from .testapp.models import KeyedBook, KeyedBookKey
+
+
+def paths(pk):
+    return set(KeyedBookKey.objects.filter(book_id=pk).values_list('path', flat=True))
+
+
+@pytest.fixture
+def book_model():
+    return KeyedBook
+
+
+def test_encode_path():
+    assert encode_path(('a', '0', 'b.c')) == '["a","0","b.c"]'
+    assert encode_path(('x' * 300,)).startswith('#')
+
+
+@pytest.mark.django_db
+def test_maintained_on_save(books):
+    pk = books[0].pk
+    assert paths(pk) == {
+        encode_path(['title']), encode_path(['author']), encode_path(['publication']), encode_path(['publication', 'year'])
+    }
+    books[0].data = {'title': 'The Hobbit'}
+    books[0].save()
+    assert paths(pk) == {encode_path(['title'])}
+    books[0].delete()
+    assert not paths(pk)
+
+
+@pytest.mark.django_db
+def test_key_lookups(books):
+    hobbit = KeyedBook.objects.create(data={'title': 'The Hobbit', 'isbn': '0261102214', 'tags': [{'name': 'fantasy'}]})
+    qs = KeyedBook.objects.filter(data__has_key='isbn')
+    assert 'testapp_keyedbookkey' in str(qs.query)
+    assert list(qs) == [hobbit]
+    assert KeyedBook.objects.filter(data__has_keys=['title', 'isbn']).get() == hobbit
+    assert KeyedBook.objects.filter(data__has_keys=['title']).count() == 3
+    assert KeyedBook.objects.filter(data__has_any_keys=['isbn', 'publication']).count() == 3
+    assert KeyedBook.objects.filter(data__has_any_keys=['foo']).count() == 0
+    assert KeyedBook.objects.filter(data__publication__has_key='year').count() == 2
+    assert KeyedBook.objects.filter(data__tags__0__has_key='name').get() == hobbit
+    assert KeyedBook.objects.exclude(data__has_key='isbn').count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_operations(books):
+    KeyedBook.objects.filter(pk=books[0].pk).update(data={'isbn': '0261102354'})
+    assert KeyedBook.objects.filter(data__has_key='isbn').count() == 1
+    created = KeyedBook.objects.bulk_create([KeyedBook(data={'isbn': '1'})])
+    if created[0].pk is not None:
+        assert KeyedBook.objects.filter(data__has_key='isbn').count() == 2
+
+
+@pytest.mark.django_db
+def test_rebuild(books):
+    KeyedBookKey.objects.all().delete()
+    rebuild_key_index(KeyedBook.objects.filter(pk=books[0].pk))
+    assert KeyedBook.objects.filter(data__has_key='title').get() == books[0]
+    call_command('rebuild_json_key_index', 'testapp.KeyedBook', verbosity=0)
+    assert KeyedBook.objects.filter(data__has_key='title').count() == 2
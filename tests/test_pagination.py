@@ -0,0 +1,72 @@
+import pytest
+from jsonfallback.pagination import KeysetPaginator
+
+from .testapp.models import Book
+
+
+def create_books():
+    books = [
+        Book.objects.create(data={'title': title, 'author': author, 'publication': {'year': year}})
+        for title, author, year in [
+            ('The Hobbit', 'Tolkien', 1937),
+            ('The Lord of the Rings', 'Tolkien', 1954),
+            ('The Silmarillion', 'Tolkien', 1977),
+            ('Harry Potter and the Philosopher\'s Stone', 'Rowling', 1997),
+            ('Harry Potter and the Chamber of Secrets', 'Rowling', 1998),
+            ('Harry Potter and the Prisoner of Azkaban', 'Rowling', 1999),
+            ('The Casual Vacancy', 'Rowling', 2012),
+            ('A Game of Thrones', 'Martin', 1996),
+        ]
+    ]
+    Book.objects.create(data={'title': 'Untitled'})
+    return books
+
+
+def all_pages(paginator):
+    titles, cursor = [], None
+    while True:
+        page = paginator.page(cursor)
+        titles.append([b.data['title'] for b in page])
+        if not page.has_next:
+            return titles
+        cursor = page.next_cursor
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_keyset_pagination():
+    books = create_books()
+    pages = all_pages(KeysetPaginator(Book.objects.all(), 'data', [('-publication.year', 'int')], per_page=3))
+    expected = [b.data['title'] for b in sorted(books, key=lambda b: -b.data['publication']['year'])]
+    assert pages == [expected[0:3], expected[3:6], expected[6:8]]
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_keyset_pagination_ties():
+    books = create_books()
+    paginator = KeysetPaginator(Book.objects.all(), 'data', ['author'], per_page=2)
+    pages = all_pages(paginator)
+    expected = [b.data['title'] for b in sorted(books, key=lambda b: (b.data['author'], b.pk))]
+    assert [t for page in pages for t in page] == expected
+    assert [len(page) for page in pages] == [2, 2, 2, 2]
+
+    paginator = KeysetPaginator(
+        Book.objects.filter(data__author='Rowling'), 'data', ['author', ('publication.year', 'int')], per_page=3
+    )
+    assert all_pages(paginator) == [
+        ['Harry Potter and the Philosopher\'s Stone', 'Harry Potter and the Chamber of Secrets',
+         'Harry Potter and the Prisoner of Azkaban'],
+        ['The Casual Vacancy'],
+    ]
+
+
+def test_keyset_pagination_invalid():
+    with pytest.raises(ValueError):
+        KeysetPaginator(Book.objects.all(), 'data', [])
+    with pytest.raises(ValueError):
+        KeysetPaginator(Book.objects.all(), 'data', [('publication.year', 'money')])
+    paginator = KeysetPaginator(Book.objects.all(), 'data', [('publication.year', 'int')])
+    for cursor in ['not a cursor', 'WzEsMiwzXQ', 'WzFd', 'WzEsImEiXQ']:
+        with pytest.raises(ValueError):
+            paginator.decode_cursor(cursor)
@@ -0,0 +1,61 @@
+import pytest
+from jsonfallback.functions import JSONProjection
+from jsonfallback.partial import PartialJSONQuerySet
+
+from .testapp.models import Book, LazyBook
+
+DOCUMENT = {
+    'title': 'The Lord of the Rings',
+    'author': 'Tolkien',
+    'publication': {'year': 1954, 'publisher': 'Allen & Unwin'},
+    'tags': ['fantasy', {'name': 'epic'}],
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_only_json():
+    book = Book.objects.create(data=DOCUMENT)
+    partial = PartialJSONQuerySet(Book).only_json('data', ['title', 'publication.year', ['tags', '1']]).get()
+    assert partial.pk == book.pk
+    assert partial.data == {'title': 'The Lord of the Rings', 'publication': {'year': 1954}, 'tags': {'1': {'name': 'epic'}}}
+    assert not hasattr(partial, '_jsonfallback_partial_data')
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_only_json_paths():
+    Book.objects.create(data=DOCUMENT)
+    qs = PartialJSONQuerySet(Book).only_json('data', ['publication.year', 'publication', 'missing'])
+    assert qs.get().data == {'publication': DOCUMENT['publication'], 'missing': None}
+    assert qs.filter(data__author='Tolkien').count() == 1
+    assert qs.only_json('data', ['author']).get().data == {'author': 'Tolkien'}
+    with pytest.raises(ValueError):
+        JSONProjection('data', [])
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_only_json_save():
+    Book.objects.create(data=DOCUMENT)
+    partial = PartialJSONQuerySet(Book).only_json('data', ['title']).get()
+    partial.data['title'] = 'The Hobbit'
+    with pytest.raises(ValueError):
+        partial.save()
+    assert Book.objects.get().data == DOCUMENT
+    partial.data = dict(DOCUMENT, title='The Hobbit')
+    partial.save()
+    assert Book.objects.get().data['title'] == 'The Hobbit'
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_only_json_lazy_unchanged():
+    LazyBook.objects.create(data=DOCUMENT)
+    partial = PartialJSONQuerySet(LazyBook).only_json('data', ['author']).get()
+    assert partial.data == {'author': 'Tolkien'}
+    partial.save()
+    assert LazyBook.objects.get().data == DOCUMENT
+    partial.data['author'] = 'J. R. R. Tolkien'
+    with pytest.raises(ValueError):
+        partial.save()
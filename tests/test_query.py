@@ -1,44 +1,18 @@
+import datetime
+
 import django
 import pytest
-from django.conf import settings
-from django.db import NotSupportedError
-from django.db.models import CharField
+from django.db.models import Avg, CharField, Count, Sum
 
 from .testapp.models import Book
-from jsonfallback.functions import JSONExtract
-
-xfail = pytest.mark.xfail(
-    condition=(
-            'postgres' not in settings.DATABASES['default']['ENGINE']
-            and 'mysql' not in settings.DATABASES['default']['ENGINE']
-    ),
-    reason='Not supported on this database',
-    raises=NotSupportedError
+from jsonfallback.functions import (
+    JSONArrayAgg, JSONArrayElements, JSONArrayLength, JSONCast, JSONExtract, JSONMerge, JSONObjectAgg,
+    JSONRemove, JSONSet,
 )
 
 
-@pytest.fixture
-def books():
-    return (
-        Book.objects.create(data={
-            'title': 'The Lord of the Rings',
-            'author': 'Tolkien',
-            'publication': {
-                'year': 1954
-            }
-        }),
-        Book.objects.create(data={
-            'title': 'Harry Potter',
-            'author': 'Rowling',
-            'publication': {
-                'year': 1997
-            }
-        })
-    )
-
-
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_subfield(books):
     assert Book.objects.filter(data__author='Tolkien').count() == 1
     assert Book.objects.filter(data__author='Brett').count() == 0
@@ -49,7 +23,7 @@ def test_query_subfield(books):
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_extract(books):
     assert list(
         Book.objects.annotate(author=JSONExtract('data', 'author'))
@@ -64,14 +38,30 @@ def test_query_extract(books):
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_contains(books):
     assert Book.objects.filter(data__contains={'author': 'Tolkien'}).count() == 1
     assert Book.objects.filter(data__contains={'author': 'Brett'}).count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
+def test_query_contains_nested():
+    Book.objects.create(data={'title': 'A', 'tags': ['fantasy', 'classic'], 'publication': {'year': 1954, 'hardcover': True}})
+    Book.objects.create(data={'title': 'B', 'tags': ['fantasy'], 'publication': {'year': 1997, 'hardcover': False}})
+    assert Book.objects.filter(data__contains={'tags': ['classic']}).count() == 1
+    assert Book.objects.filter(data__contains={'tags': ['fantasy']}).count() == 2
+    assert Book.objects.filter(data__contains={'tags': ['horror']}).count() == 0
+    assert Book.objects.filter(data__contains={'publication': {'hardcover': True}}).count() == 1
+    assert Book.objects.filter(data__contains={'publication': {'year': 1997}}).count() == 1
+    assert Book.objects.filter(data__contained_by={'title': 'B', 'tags': ['horror', 'fantasy'],
+                                                   'publication': {'year': 1997, 'hardcover': False}}).count() == 1
+    assert Book.objects.filter(data__contained_by={'title': 'B', 'tags': ['horror'],
+                                                   'publication': {'year': 1997, 'hardcover': False}}).count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
 def test_query_contained_by(books):
     assert Book.objects.filter(data__contained_by={'title': 'Harry Potter', 'author': 'Rowling',
                                                    'publication': {'year': 1997}}).count() == 1
@@ -79,28 +69,28 @@ def test_query_contained_by(books):
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_has_key(books):
     assert Book.objects.filter(data__has_key='title').count() == 2
     assert Book.objects.filter(data__has_key='foo').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_has_keys(books):
     assert Book.objects.filter(data__has_keys=['title']).count() == 2
     assert Book.objects.filter(data__has_keys=['foo']).count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_has_any_keys(books):
     assert Book.objects.filter(data__has_any_keys=['title', 'foo']).count() == 2
     assert Book.objects.filter(data__has_any_keys=['foo']).count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_exact_of_field(books):
     assert Book.objects.filter(data__title__exact='Harry Potter').count() == 1
     assert Book.objects.filter(data__title__exact='harry Potter').count() == 0
@@ -109,62 +99,75 @@ def test_query_exact_of_field(books):
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_iexact_of_field(books):
     assert Book.objects.filter(data__title__iexact='harry potter').count() == 1
     assert Book.objects.filter(data__title__iexact='Potter').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_startswith_of_field(books):
     assert Book.objects.filter(data__title__startswith='Harry').count() == 1
     assert Book.objects.filter(data__title__startswith='Potter').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_istartswith_of_field(books):
     assert Book.objects.filter(data__title__istartswith='harry').count() == 1
     assert Book.objects.filter(data__title__istartswith='potter').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_endswith_of_field(books):
     assert Book.objects.filter(data__title__endswith='Potter').count() == 1
     assert Book.objects.filter(data__title__endswith='Harry').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_iendswith_of_field(books):
     assert Book.objects.filter(data__title__iendswith='potter').count() == 1
     assert Book.objects.filter(data__title__iendswith='harry').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_contains_of_field(books):
     assert Book.objects.filter(data__title__contains='Potter').count() == 1
     assert Book.objects.filter(data__title__contains='foo').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_query_icontains_of_field(books):
     assert Book.objects.filter(data__title__icontains='potter').count() == 1
     assert Book.objects.filter(data__title__icontains='foo').count() == 0
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 def test_in_of_field(books):
     assert Book.objects.filter(data__publication__year__in=[1997, 1998]).count() == 1
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
+def test_in_of_field_long_list(books):
+    Book.objects.create(data={'author': 1954, 'publication': {'year': '1954'}})
+    years = list(range(1000, 1960))
+    assert Book.objects.filter(data__publication__year__in=years).count() == 1
+    assert Book.objects.filter(data__publication__year__in=[str(y) for y in years]).count() == 1
+    authors = ['Author {}'.format(i) for i in range(500)] + ['Tolkien', '1954']
+    assert Book.objects.filter(data__author__in=authors).count() == 1
+    assert Book.objects.filter(data__author__in=authors + [1954]).count() == 2
+    assert Book.objects.filter(data__author__in=['Tolkien', 'Rowling']).count() == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
 def test_query_gt_lt_of_field(books):
     assert Book.objects.filter(data__publication__year__gt=1900).count() == 2
     assert Book.objects.filter(data__publication__year__gt=1990).count() == 1
@@ -177,7 +180,7 @@ def test_query_gt_lt_of_field(books):
 
 
 @pytest.mark.django_db
-@xfail
+@pytest.mark.json_queries
 @pytest.mark.skipif(django.VERSION < (2, 1), reason="Not supported on Django 2.0")
 def test_order_by(books):
     assert list(Book.objects.order_by('data__title').values_list('data__title', flat=True)) == [
@@ -192,3 +195,207 @@ def test_order_by(books):
 def test_query_equal(books):
     assert Book.objects.filter(data={'author': 'Rowling', 'title': 'Harry Potter', 'publication': {'year': 1997}}).count() == 1
     assert Book.objects.filter(data={'author': 'Brett'}).count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_query_member_of():
+    Book.objects.create(data={'title': 'A', 'tags': ['fantasy', 'epic', 3]})
+    Book.objects.create(data={'title': 'B', 'tags': ['scifi']})
+    assert Book.objects.filter(data__tags__member_of='fantasy').count() == 1
+    assert Book.objects.filter(data__tags__member_of=3).count() == 1
+    assert Book.objects.filter(data__tags__member_of='3').count() == 0
+    assert Book.objects.filter(data__tags__member_of='horror').count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_query_overlaps():
+    Book.objects.create(data={'title': 'A', 'tags': ['fantasy', 'epic']})
+    Book.objects.create(data={'title': 'B', 'tags': ['scifi']})
+    assert Book.objects.filter(data__tags__overlaps=['epic', 'scifi']).count() == 2
+    assert Book.objects.filter(data__tags__overlaps=['scifi', 'horror']).count() == 1
+    assert Book.objects.filter(data__tags__overlaps=['horror']).count() == 0
+    assert Book.objects.filter(data__tags__overlaps=[]).count() == 0
+    with pytest.raises(ValueError):
+        Book.objects.filter(data__tags__overlaps='epic')
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_update_json_set(books):
+    Book.objects.filter(data__author='Tolkien').update(data=JSONSet('data', 'publication.year', 1955))
+    Book.objects.update(data=JSONSet('data', 'rating', {'stars': 5, 'reviews': [1, 2]}))
+    books[0].refresh_from_db()
+    books[1].refresh_from_db()
+    assert books[0].data['publication'] == {'year': 1955}
+    assert books[1].data['publication'] == {'year': 1997}
+    assert books[1].data['rating'] == {'stars': 5, 'reviews': [1, 2]}
+    assert Book.objects.filter(data__rating__stars=5).count() == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_update_json_remove(books):
+    Book.objects.filter(pk=books[0].pk).update(data=JSONRemove(JSONRemove('data', 'author'), ['publication', 'year']))
+    books[0].refresh_from_db()
+    assert books[0].data == {'title': 'The Lord of the Rings', 'publication': {}}
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_update_json_merge(books):
+    Book.objects.filter(pk=books[0].pk).update(data=JSONMerge('data', {'title': 'The Hobbit', 'isbn': '123'}))
+    books[0].refresh_from_db()
+    assert books[0].data == {
+        'title': 'The Hobbit', 'author': 'Tolkien', 'publication': {'year': 1954}, 'isbn': '123'
+    }
+    with pytest.raises(ValueError):
+        JSONMerge('data', [1])
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_array_elements():
+    Book.objects.create(data={'title': 'A', 'tags': ['fantasy', 'epic']})
+    Book.objects.create(data={'title': 'B', 'tags': ['epic', {'name': 'long'}, 3]})
+    Book.objects.create(data={'title': 'C', 'tags': {'epic': True}})
+    Book.objects.create(data={'title': 'D'})
+    qs = Book.objects.annotate(tag=JSONArrayElements('data', 'tags'))
+    assert len(qs) == 5
+    assert sorted(qs.values_list('tag', flat=True), key=str) == [3, 'epic', 'epic', 'fantasy', {'name': 'long'}]
+    assert len(qs.filter(data__title='B')) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_array_elements_queryset_methods():
+    Book.objects.create(data={'title': 'A', 'tags': ['fantasy', 'epic']})
+    Book.objects.create(data={'title': 'B', 'tags': ['epic']})
+    Book.objects.create(data={'title': 'C'})
+    qs = Book.objects.annotate(tag=JSONArrayElements('data', 'tags'))
+    assert qs.count() == 3
+    assert qs.filter(data__title='A').count() == 2
+    assert qs.filter(data__title='B').exists()
+    assert not qs.filter(data__title='C').exists()
+    combined = qs.filter(data__title='A') | qs.filter(data__title='B')
+    assert combined.count() == 3
+    assert sorted(combined.values_list('tag', flat=True)) == ['epic', 'epic', 'fantasy']
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_array_elements_group_by():
+    Book.objects.create(data={'orders': [{'sku': 'a', 'qty': 1}, {'sku': 'b', 'qty': 2}]})
+    Book.objects.create(data={'orders': [{'sku': 'a', 'qty': 3}]})
+    Book.objects.create(data={'orders': []})
+    qs = Book.objects.annotate(order=JSONArrayElements('data', 'orders')).values(
+        sku=JSONExtract('order', 'sku')
+    ).annotate(count=Count('*'))
+    assert sorted((r['sku'], r['count']) for r in qs) == [('a', 2), ('b', 1)]
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_json_array_agg(books):
+    Book.objects.create(data={'title': 'The Hobbit', 'author': 'Tolkien'})
+    docs = Book.objects.aggregate(docs=JSONArrayAgg('data'))['docs']
+    assert sorted(d['title'] for d in docs) == ['Harry Potter', 'The Hobbit', 'The Lord of the Rings']
+    assert books[0].data in docs
+    qs = Book.objects.values(author=JSONExtract('data', 'author')).annotate(
+        titles=JSONArrayAgg(JSONExtract('data', 'title')), ids=JSONArrayAgg('pk'),
+    )
+    result = {r['author']: sorted(r['titles']) for r in qs}
+    assert result == {'Rowling': ['Harry Potter'], 'Tolkien': ['The Hobbit', 'The Lord of the Rings']}
+    assert sorted(i for r in qs for i in r['ids']) == sorted(Book.objects.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_json_object_agg(books):
+    years = Book.objects.aggregate(
+        years=JSONObjectAgg(JSONExtract('data', 'author'), JSONExtract('data', 'publication'))
+    )['years']
+    assert years == {'Tolkien': {'year': 1954}, 'Rowling': {'year': 1997}}
+    qs = Book.objects.values(author=JSONExtract('data', 'author')).annotate(
+        years=JSONObjectAgg(JSONExtract('data', 'title'), JSONExtract('data', 'publication', 'year'))
+    )
+    assert {r['author']: r['years'] for r in qs} == {
+        'Tolkien': {'The Lord of the Rings': 1954}, 'Rowling': {'Harry Potter': 1997}
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_key_cast_filter(books):
+    Book.objects.create(data={'title': 'A', 'publication': {'year': 200}, 'price': 9.5, 'new': True,
+                              'released': '2018-05-01'})
+    Book.objects.create(data={'title': 'B', 'publication': {'year': '2001'}, 'price': '12.25', 'new': False})
+    assert Book.objects.filter(data__publication__year__as_int__gte=1990).count() == 2
+    assert Book.objects.filter(data__publication__year__as_int__lt=1000).count() == 1
+    assert Book.objects.filter(data__publication__year__as_int__in=[200, 1954]).count() == 2
+    assert Book.objects.filter(data__price__as_float__gt=10).count() == 1
+    assert Book.objects.filter(data__new__as_bool=True).count() == 1
+    assert Book.objects.filter(data__new__as_bool=False).count() == 1
+    assert Book.objects.filter(data__released__as_date=datetime.date(2018, 5, 1)).count() == 1
+    assert Book.objects.filter(data__title__as_text='A').count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_keys_named_like_casts():
+    Book.objects.create(data={'order': {'date': '2020-01-01', 'int': 3}, 'text': 'x'})
+    assert Book.objects.filter(data__order__date='2020-01-01').count() == 1
+    assert Book.objects.filter(data__order__int=3).count() == 1
+    assert Book.objects.filter(data__text='x').count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_key_cast_annotate(books):
+    Book.objects.create(data={'title': 'A', 'publication': {'year': 200}, 'price': 9.5})
+    Book.objects.create(data={'title': 'B', 'publication': {'year': 2001}, 'price': 12.5})
+    year = JSONCast('data', 'publication.year', 'int')
+    assert Book.objects.aggregate(s=Sum(year))['s'] == 1954 + 1997 + 200 + 2001
+    assert Book.objects.aggregate(a=Avg(JSONCast('data', 'price', 'float')))['a'] == 11
+    assert [b.data['title'] for b in Book.objects.order_by(year.desc())] == [
+        'B', 'Harry Potter', 'The Lord of the Rings', 'A'
+    ]
+    assert [b.year for b in Book.objects.annotate(year=year).order_by('year')] == [200, 1954, 1997, 2001]
+    assert Book.objects.annotate(title=JSONCast('data', 'title', 'text')).order_by('title').first().title == 'A'
+    with pytest.raises(ValueError):
+        JSONCast('data', 'price', 'money')
+
+
+@pytest.mark.django_db
+@pytest.mark.json_queries
+def test_array_length():
+    Book.objects.create(data={'title': 'A', 'tags': ['fantasy', 'epic', 'long'], 'shelf': {'row': 1}})
+    Book.objects.create(data={'title': 'B', 'tags': [], 'reviews': {'stars': [5, 4]}})
+    Book.objects.create(data=['not', 'an', 'object'])
+    Book.objects.create(data={'title': 'C', 'tags': 'scifi'})
+    assert Book.objects.filter(data__tags__array_len__gte=1).count() == 1
+    assert Book.objects.filter(data__tags__array_len=0).count() == 1
+    assert Book.objects.filter(data__tags__array_len__isnull=True).count() == 2
+    assert Book.objects.filter(data__shelf__array_len__isnull=False).count() == 0
+    assert Book.objects.filter(data__reviews__stars__array_len=2).count() == 1
+    assert Book.objects.filter(data__array_len=3).count() == 1
+    Book.objects.create(data={'title': 'D', 'len': 3, 'tags': {'len': 2}})
+    assert Book.objects.filter(data__len=3).count() == 1
+    assert Book.objects.filter(data__tags__len=2).count() == 1
+    tags = JSONArrayLength('data', 'tags')
+    assert [b.tags for b in Book.objects.annotate(tags=tags).filter(tags__isnull=False).order_by('tags')] == [0, 3]
+    assert [b.data['title'] for b in Book.objects.filter(data__tags__array_len__isnull=False).order_by(tags.desc())] == ['A', 'B']
+
+
+@pytest.mark.django_db(transaction=True)  # InnoDB updates FULLTEXT indexes on commit
+@pytest.mark.json_queries
+def test_query_search(books):
+    Book.objects.create(data={'title': 'The Fellowship of the Ring', 'summary': 'Frodo leaves the Shire'})
+    assert Book.objects.filter(data__title__search='ring').count() == 1
+    assert Book.objects.filter(data__title__search='Fellowship ring').count() == 1
+    assert Book.objects.filter(data__title__search='fellowship potter').count() == 0
+    assert Book.objects.filter(data__title__search='potter').get().data['author'] == 'Rowling'
+    assert Book.objects.filter(data__title__search='').count() == 0
+    # Without an index
+    assert Book.objects.filter(data__summary__search='shire frodo').count() == 1
@@ -1,8 +1,14 @@
+import json
 from datetime import date
 
 import pytest
+from django.core import serializers
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from jsonfallback.fields import has_json_changed
+from jsonfallback.lazy import LazyJSON
 
-from .testapp.models import Book
+from .testapp.models import Book, LazyBook
 
 
 @pytest.mark.django_db
@@ -37,3 +43,105 @@ def test_nullable():
     b.clean()
     assert b.data is None
 """
+
+
+@pytest.mark.django_db
+def test_lazy_decoding():
+    LazyBook.objects.create(data={'title': 'The Lord of the Rings', 'date': date(1954, 7, 29)})
+    b = LazyBook.objects.first()
+    assert isinstance(b.data, LazyJSON)
+    assert not b.data.is_decoded
+    assert b.data['title'] == 'The Lord of the Rings'
+    assert b.data.is_decoded
+    assert b.data == {'title': 'The Lord of the Rings', 'date': '1954-07-29'}
+
+
+@pytest.mark.django_db
+def test_lazy_save_untouched():
+    LazyBook.objects.create(data={'title': 'The Lord of the Rings'})
+    b = LazyBook.objects.first()
+    b.save()
+    assert not b.data.is_decoded
+    assert LazyBook.objects.first().data == {'title': 'The Lord of the Rings'}
+
+
+@pytest.mark.django_db
+def test_lazy_save_modified():
+    LazyBook.objects.create(data={'title': 'The Lord of the Rings'})
+    b = LazyBook.objects.first()
+    b.data['author'] = 'Tolkien'
+    b.save()
+    assert LazyBook.objects.first().data == {'title': 'The Lord of the Rings', 'author': 'Tolkien'}
+
+
+@pytest.mark.django_db
+def test_lazy_clean_and_serialize():
+    LazyBook.objects.create(data={'title': 'The Lord of the Rings'})
+    b = LazyBook.objects.first()
+    b.full_clean()
+    assert b.data == {'title': 'The Lord of the Rings'}
+    b = LazyBook.objects.first()
+    assert json.loads(serializers.serialize('json', [b]))[0]['fields']['data'] == {'title': 'The Lord of the Rings'}
+
+
+@pytest.mark.django_db
+def test_lazy_save_skips_unchanged():
+    LazyBook.objects.create(data={'title': 'The Lord of the Rings', 'year': 1954})
+    b = LazyBook.objects.first()
+    assert b.data['title'] == 'The Lord of the Rings'
+    assert not has_json_changed(b)
+    with CaptureQueriesContext(connection) as ctx:
+        b.save()
+    assert not any(q['sql'].startswith('UPDATE') for q in ctx.captured_queries)
+    b.data['year'] = True
+    assert has_json_changed(b, 'data')
+    b.save()
+    assert LazyBook.objects.first().data == {'title': 'The Lord of the Rings', 'year': True}
+
+
+@pytest.mark.django_db
+def test_save_skips_unchanged():
+    b = Book.objects.create(data={'title': 'The Lord of the Rings', 'year': 1954})
+    assert has_json_changed(b)
+    b = Book.objects.first()
+    assert not has_json_changed(b)
+    with CaptureQueriesContext(connection) as ctx:
+        b.save()
+    assert not any(q['sql'].startswith('UPDATE') for q in ctx.captured_queries)
+    b.data['year'] = True
+    assert has_json_changed(b, 'data')
+    b.save()
+    assert Book.objects.first().data == {'title': 'The Lord of the Rings', 'year': True}
+    assert not has_json_changed(Book.objects.first())
+
+
+@pytest.mark.django_db
+def test_changed_when_saved_to_another_row():
+    Book.objects.create(data={'title': 'The Hobbit'})
+    Book.objects.create(data={'title': 'The Lord of the Rings'})
+    hobbit, rings = Book.objects.order_by('pk')
+    hobbit.pk = rings.pk
+    assert has_json_changed(hobbit)
+    hobbit.save()
+    assert Book.objects.get(pk=rings.pk).data == {'title': 'The Hobbit'}
+
+
+@pytest.mark.django_db
+def test_changed_when_saved_to_another_database():
+    Book.objects.create(data={'title': 'The Hobbit'})
+    b = Book.objects.get()
+    field = Book._meta.get_field('data')
+    assert not field.has_changed(b, using=b._state.db)
+    assert field.has_changed(b, using='other')
+
+
+@pytest.mark.django_db
+def test_changed_when_assigned():
+    Book.objects.create(data={'title': 'The Hobbit'})
+    Book.objects.create(data={'title': 'The Lord of the Rings'})
+    hobbit, rings = Book.objects.order_by('pk')
+    rings.data = hobbit.data
+    assert not has_json_changed(hobbit)
+    assert has_json_changed(rings)
+    rings.save()
+    assert Book.objects.get(pk=rings.pk).data == {'title': 'The Hobbit'}
@@ -0,0 +1,22 @@
+import jsonfallback.fields
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LazyBook',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', jsonfallback.fields.FallbackJSONField(
+                    encoder=DjangoJSONEncoder, null=False, default=dict, lazy=True
+                )),
+            ],
+        ),
+    ]
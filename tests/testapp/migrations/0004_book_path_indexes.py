@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-16 21:03
+
+import jsonfallback.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0003_cachedbook'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=jsonfallback.indexes.JSONPathIndex(fields=['data'], name='testapp_boo_data_672fe5_jpi', output_field=models.CharField(max_length=255), path=['author']),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=jsonfallback.indexes.JSONPathIndex(fields=['data'], name='testapp_boo_data_b8b7f4_jpi', output_field=models.IntegerField(), path=['publication', 'year']),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-16 21:04
+
+import jsonfallback.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0004_book_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=jsonfallback.indexes.JSONGinIndex(fields=['data'], name='testapp_boo_data_a21757_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=jsonfallback.indexes.JSONGinIndex(fields=['data'], name='testapp_book_data_path_ops', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.28 on 2026-10-16 21:06
+
+import django.core.serializers.json
+import jsonfallback.fields
+import jsonfallback.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0005_book_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaggedBook',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', jsonfallback.fields.FallbackJSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='taggedbook',
+            index=jsonfallback.indexes.JSONArrayIndex(fields=['data'], name='testapp_tag_data_cadc97_jai', output_field=models.CharField(max_length=64), path=['tags']),
+        ),
+    ]
@@ -0,0 +1,32 @@
+import django.db.models.deletion
+import jsonfallback.fields
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0010_digestbook'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeyedBook',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', jsonfallback.fields.FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KeyedBookKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(db_index=True, max_length=255)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='testapp.KeyedBook')),
+            ],
+            options={
+                'unique_together': {('path', 'book')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-16 23:12
+
+import jsonfallback.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0011_keyedbook'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=jsonfallback.indexes.JSONSearchIndex(fields=['data'], name='testapp_boo_data_299fc4_jsi', output_field=models.TextField(), path=['title']),
+        ),
+    ]
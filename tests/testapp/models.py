@@ -1,10 +1,76 @@
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-from jsonfallback.fields import FallbackJSONField
+from jsonfallback.batch import BatchDecodeQuerySet
+from jsonfallback.fields import FallbackJSONField, JSONDigestField
+from jsonfallback.indexes import (
+    JSONArrayIndex, JSONGinIndex, JSONPathIndex, JSONSearchIndex,
+)
+from jsonfallback.keyindex import JSONKeyIndex, KeyIndexQuerySet
 
 
 class Book(models.Model):
     data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default={'foo': 'bar'})
 
+    class Meta:
+        indexes = [
+            JSONPathIndex(fields=['data'], path='author'),
+            JSONPathIndex(fields=['data'], path='publication.year', output_field=models.IntegerField()),
+            JSONGinIndex(fields=['data']),
+            JSONGinIndex(fields=['data'], name='testapp_book_data_path_ops', opclasses=['jsonb_path_ops']),
+            JSONSearchIndex(fields=['data'], path='title', output_field=models.TextField()),
+        ]
+
     def __str__(self):
         return str(self.data['title'])
+
+
+class TaggedBook(models.Model):
+    # On MySQL 8.0.17+, the multi-valued index rejects documents whose tags cannot
+    # be cast to CHAR(64), e.g. objects, so it is kept off Book
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict)
+
+    class Meta:
+        indexes = [
+            JSONArrayIndex(fields=['data'], path='tags', output_field=models.CharField(max_length=64)),
+        ]
+
+
+class LazyBook(models.Model):
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict, lazy=True)
+
+
+class CachedBook(models.Model):
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict, decode_cache=True)
+
+
+class BatchedBook(models.Model):
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict, batch_decode=True)
+
+    objects = BatchDecodeQuerySet.as_manager()
+
+
+class CompressedBook(models.Model):
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict, compression='zlib')
+
+
+class BinaryBook(models.Model):
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict, binary=True)
+
+
+class DigestBook(models.Model):
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict)
+    data_digest = JSONDigestField(source='data')
+
+
+class KeyedBook(models.Model):
+    data = FallbackJSONField(encoder=DjangoJSONEncoder, null=False, default=dict)
+
+    objects = KeyIndexQuerySet.as_manager()
+
+
+class KeyedBookKey(JSONKeyIndex):
+    json_field = 'data'
+    book = models.ForeignKey(KeyedBook, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = [('path', 'book')]